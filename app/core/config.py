@@ -5,41 +5,57 @@ Kiro-2API Configuration Module.
 Centralized configuration management using Pydantic Settings.
 """
 
-import re
+import functools
 import os
+import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
-def _get_raw_env_value(var_name: str, env_file: str = ".env") -> Optional[str]:
-    """Read raw variable value from .env file without processing escape sequences."""
-    env_path = Path(env_file)
-    if not env_path.exists():
-        return None
+@functools.lru_cache(maxsize=4)
+def _parse_env_file(env_file: str, mtime: float) -> Dict[str, str]:
+    """Parse raw KEY=VALUE pairs from .env file (cached until the file changes)."""
+    values: Dict[str, str] = {}
+    content = Path(env_file).read_text(encoding="utf-8")
 
-    try:
-        content = env_path.read_text(encoding="utf-8")
-        pattern = rf'^{re.escape(var_name)}=(["\']?)(.+?)\1\s*$'
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+
+        key, eq, value = line.partition("=")
+        if not eq or key in values:
+            continue
 
-        for line in content.splitlines():
-            line = line.strip()
-            if line.startswith("#") or not line:
-                continue
+        value = value.rstrip()
+        if len(value) >= 2 and value[0] in ('"', "'") and value[-1] == value[0]:
+            value = value[1:-1]
+        if value:
+            values[key] = value
 
-            match = re.match(pattern, line)
-            if match:
-                return match.group(2)
+    return values
+
+
+def _get_raw_env_value(var_name: str, env_file: str = ".env") -> Optional[str]:
+    """Read raw variable value from .env file without processing escape sequences."""
+    try:
+        mtime = os.stat(env_file).st_mtime
+        return _parse_env_file(env_file, mtime).get(var_name)
     except (FileNotFoundError, PermissionError, OSError):
         pass
-    except (re.error, ValueError):
+    except ValueError:
         pass
 
     return None
 
 
+_VALID_LOG_LEVELS: frozenset = frozenset({"TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"})
+_VALID_DEBUG_MODES: frozenset = frozenset({"off", "errors", "all"})
+
+
 class Settings(BaseSettings):
     """Application configuration using Pydantic Settings."""
 
@@ -61,31 +77,47 @@ class Settings(BaseSettings):
 
     # Token Settings
     token_refresh_threshold: int = Field(default=600)
+    tenant_auth_cache_size: int = Field(default=256, alias="TENANT_AUTH_CACHE_SIZE")
 
     # Retry Configuration
     max_retries: int = Field(default=3, alias="MAX_RETRIES")
     base_retry_delay: float = Field(default=1.0, alias="BASE_RETRY_DELAY")
+    max_retry_delay: float = Field(default=30.0, alias="MAX_RETRY_DELAY")
 
     # Model Cache Settings
     model_cache_ttl: int = Field(default=3600, alias="MODEL_CACHE_TTL")
+    model_cache_max_size: int = Field(default=256, alias="MODEL_CACHE_MAX_SIZE")
     default_max_input_tokens: int = Field(default=200000)
 
     # Tool Description Processing
     tool_description_max_length: int = Field(default=10000, alias="TOOL_DESCRIPTION_MAX_LENGTH")
 
+    # Tokenizer Settings
+    tiktoken_cache_dir: str = Field(default="", alias="TIKTOKEN_CACHE_DIR")
+
     # Logging Settings
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_enqueue: bool = Field(default=True, alias="LOG_ENQUEUE")
 
     # Timeout Settings
     first_token_timeout: float = Field(default=120.0, alias="FIRST_TOKEN_TIMEOUT")
     first_token_max_retries: int = Field(default=3, alias="FIRST_TOKEN_MAX_RETRIES")
     stream_read_timeout: float = Field(default=300.0, alias="STREAM_READ_TIMEOUT")
     non_stream_timeout: float = Field(default=900.0, alias="NON_STREAM_TIMEOUT")
+    parser_max_buffer_bytes: int = Field(default=8 * 1024 * 1024, alias="PARSER_MAX_BUFFER_BYTES")
+    stream_coalesce_ms: float = Field(default=10.0, alias="STREAM_COALESCE_MS")
+    stream_coalesce_max_chars: int = Field(default=256, alias="STREAM_COALESCE_MAX_CHARS")
+
+    # HTTP Client Settings
+    enable_http2: bool = Field(default=True, alias="ENABLE_HTTP2")
 
     # Debug Settings
     debug_mode: str = Field(default="off", alias="DEBUG_MODE")
     debug_dir: str = Field(default="debug_logs", alias="DEBUG_DIR")
 
+    # Request Tracking
+    tracking_skip_paths: str = Field(default="/health,/docs,/openapi.json,/redoc", alias="TRACKING_SKIP_PATHS")
+
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=0, alias="RATE_LIMIT_PER_MINUTE")
 
@@ -95,18 +127,16 @@ class Settings(BaseSettings):
     @field_validator("log_level")
     @classmethod
     def validate_log_level(cls, v: str) -> str:
-        valid_levels = {"TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
         v = v.upper()
-        if v not in valid_levels:
+        if v not in _VALID_LOG_LEVELS:
             return "INFO"
         return v
 
     @field_validator("debug_mode")
     @classmethod
     def validate_debug_mode(cls, v: str) -> str:
-        valid_modes = {"off", "errors", "all"}
         v = v.lower()
-        if v not in valid_modes:
+        if v not in _VALID_DEBUG_MODES:
             return "off"
         return v
 
@@ -127,6 +157,8 @@ SLOW_MODELS: frozenset = frozenset({
     "claude-3-opus",
     "claude-3-opus-20240229",
 })
+# Prefix tuple so dated variants (e.g. "claude-3-opus-2024...") match in one C-level startswith call
+_SLOW_MODEL_PREFIXES: tuple = tuple(sorted({m.lower() for m in SLOW_MODELS}, key=len, reverse=True))
 
 
 # Kiro API URL Templates
@@ -151,8 +183,9 @@ MODEL_MAPPING: Dict[str, str] = {
     "auto": "claude-sonnet-4.5",
 }
 
-# Available models list for /v1/models endpoint
-AVAILABLE_MODELS: List[str] = [
+# Available models for /v1/models endpoint; a tuple because the route
+# serializes it once at import, so it must not change at runtime
+AVAILABLE_MODELS: Tuple[str, ...] = (
     "claude-opus-4-5",
     "claude-opus-4-5-20251101",
     "claude-haiku-4-5",
@@ -162,7 +195,14 @@ AVAILABLE_MODELS: List[str] = [
     "claude-sonnet-4",
     "claude-sonnet-4-20250514",
     "claude-3-7-sonnet-20250219",
-]
+)
+
+# Resolver accepting both external names and Kiro internal IDs
+_MODEL_RESOLVER: Dict[str, str] = {
+    **{internal_id: internal_id for internal_id in MODEL_MAPPING.values()},
+    **MODEL_MAPPING,
+}
+_AVAILABLE_MODELS_STR: str = ", ".join(sorted(AVAILABLE_MODELS))
 
 
 _FAKE_REASONING_RAW: str = os.getenv("FAKE_REASONING", "").lower()
@@ -176,6 +216,11 @@ else:
     FAKE_REASONING_HANDLING: str = "as_reasoning_content"
 
 FAKE_REASONING_OPEN_TAGS: List[str] = ["<thinking>", "<think>", "<reasoning>", "<thought>"]
+# Single alternation over all open tags in list order (the first listed tag wins),
+# shared by ThinkingParser instances using the default tags
+FAKE_REASONING_TAG_RE: re.Pattern = re.compile(
+    "|".join(re.escape(tag) for tag in FAKE_REASONING_OPEN_TAGS)
+)
 FAKE_REASONING_INITIAL_BUFFER_SIZE: int = int(os.getenv("FAKE_REASONING_INITIAL_BUFFER_SIZE", "20"))
 
 
@@ -185,26 +230,31 @@ APP_TITLE: str = "Kiro-2API"
 APP_DESCRIPTION: str = "OpenAI compatible Kiro API gateway"
 
 
+@functools.lru_cache(maxsize=16)
 def get_kiro_refresh_url(region: str) -> str:
     """Return token refresh URL for specified region."""
     return KIRO_REFRESH_URL_TEMPLATE.format(region=region)
 
 
+@functools.lru_cache(maxsize=16)
 def get_aws_sso_oidc_url(region: str) -> str:
     """Return AWS SSO OIDC token URL for specified region."""
     return AWS_SSO_OIDC_URL_TEMPLATE.format(region=region)
 
 
+@functools.lru_cache(maxsize=16)
 def get_kiro_api_host(region: str) -> str:
     """Return API host for specified region."""
     return KIRO_API_HOST_TEMPLATE.format(region=region)
 
 
+@functools.lru_cache(maxsize=16)
 def get_kiro_q_host(region: str) -> str:
     """Return Q API host for specified region."""
     return KIRO_Q_HOST_TEMPLATE.format(region=region)
 
 
+@functools.lru_cache(maxsize=256)
 def get_internal_model_id(external_model: str) -> str:
     """
     Convert external model name to Kiro internal ID.
@@ -218,17 +268,13 @@ def get_internal_model_id(external_model: str) -> str:
     Raises:
         ValueError: If model is not supported
     """
-    if external_model in MODEL_MAPPING:
-        return MODEL_MAPPING[external_model]
-
-    valid_internal_ids = set(MODEL_MAPPING.values())
-    if external_model in valid_internal_ids:
-        return external_model
-
-    available = ", ".join(sorted(AVAILABLE_MODELS))
-    raise ValueError(f"Unsupported model: {external_model}. Available: {available}")
+    internal_id = _MODEL_RESOLVER.get(external_model)
+    if internal_id is None:
+        raise ValueError(f"Unsupported model: {external_model}. Available: {_AVAILABLE_MODELS_STR}")
+    return internal_id
 
 
+@functools.lru_cache(maxsize=256)
 def get_adaptive_timeout(model: str, base_timeout: float) -> float:
     """
     Get adaptive timeout based on model type.
@@ -242,12 +288,7 @@ def get_adaptive_timeout(model: str, base_timeout: float) -> float:
     Returns:
         Adjusted timeout in seconds
     """
-    if not model:
-        return base_timeout
-
-    model_lower = model.lower()
-    for slow_model in SLOW_MODELS:
-        if slow_model.lower() in model_lower:
-            return base_timeout * settings.slow_model_timeout_multiplier
+    if model and model.lower().startswith(_SLOW_MODEL_PREFIXES):
+        return base_timeout * settings.slow_model_timeout_multiplier
 
     return base_timeout
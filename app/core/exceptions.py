@@ -14,6 +14,17 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 
+def _needs_sanitize(errors: List[Dict[str, Any]]) -> bool:
+    """Check whether any validation error contains bytes values."""
+    for error in errors:
+        for value in error.values():
+            if isinstance(value, bytes):
+                return True
+            if isinstance(value, (list, tuple)) and any(isinstance(v, bytes) for v in value):
+                return True
+    return False
+
+
 def sanitize_validation_errors(errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Transform validation errors to JSON-serializable format.
@@ -26,7 +37,11 @@ def sanitize_validation_errors(errors: List[Dict[str, Any]]) -> List[Dict[str, A
 
     Returns:
         List of errors with bytes converted to strings
+        (the original list if no bytes are present)
     """
+    if not _needs_sanitize(errors):
+        return errors
+
     sanitized = []
     for error in errors:
         sanitized_error = {}
@@ -59,14 +74,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         JSONResponse with error details and status 422
     """
     body = await request.body()
-    body_str = body.decode("utf-8", errors="replace")
+    # Only decode the preview - bounds the cost for huge invalid bodies
+    body_preview = body[:500].decode("utf-8", errors="replace")
 
     sanitized_errors = sanitize_validation_errors(exc.errors())
 
     logger.error(f"Validation error (422): {sanitized_errors}")
-    logger.error(f"Request body: {body_str[:500]}...")
+    logger.error(f"Request body: {body_preview}...")
 
     return JSONResponse(
         status_code=422,
-        content={"detail": sanitized_errors, "body": body_str[:500]},
+        content={"detail": sanitized_errors, "body": body_preview},
     )
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Response classes for Kiro-2API.
+
+JSON responses are rendered with fast_json (orjson when installed).
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.utils import fast_json
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with fast_json instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return fast_json.dumps_bytes(content)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+API key helpers for Kiro-2API.
+
+Shared by the route dependencies that check the proxy API key in the
+Authorization header.
+"""
+
+import hmac
+from typing import Tuple
+
+from fastapi.security import APIKeyHeader
+
+from app.core.config import settings
+
+
+# Declares the Authorization header scheme in OpenAPI (Swagger "Authorize")
+api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
+
+# Encoded once; compare_digest on str also rejects non-ASCII input with TypeError
+_PROXY_API_KEY_BYTES: bytes = settings.proxy_api_key.encode("utf-8")
+
+
+def mask_token(token: str) -> str:
+    """Mask token for logging."""
+    if len(token) <= 8:
+        return "***"
+    return f"{token[:4]}...{token[-4:]}"
+
+
+def split_auth_header(auth_header: str) -> Tuple[str, str, str]:
+    """
+    Split Authorization header into proxy key and optional refresh token.
+
+    Supports both "Bearer {token}" format and raw token (for Swagger UI).
+
+    Args:
+        auth_header: Authorization header value
+
+    Returns:
+        Tuple (proxy_key, separator, refresh_token); separator is ":" in
+        multi-tenant format and "" otherwise
+    """
+    token = auth_header[7:] if auth_header.startswith("Bearer ") else auth_header
+    return token.partition(':')
+
+
+def is_valid_proxy_key(proxy_key: str) -> bool:
+    """Constant-time check of proxy_key against PROXY_API_KEY."""
+    return hmac.compare_digest(proxy_key.encode("utf-8"), _PROXY_API_KEY_BYTES)
@@ -10,11 +10,15 @@ Manages access token lifecycle:
 """
 
 import asyncio
-import json
+import functools
+import hashlib
+import sys
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import httpx
 from loguru import logger
@@ -26,9 +30,62 @@ from app.core.config import (
     get_kiro_q_host,
     get_aws_sso_oidc_url,
 )
+from app.utils import fast_json
 from app.utils.helpers import get_machine_fingerprint
 
 
+# Fingerprint is process-global - compute once at import
+_MACHINE_FINGERPRINT: str = get_machine_fingerprint()
+
+_refresh_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_refresh_http_client() -> httpx.AsyncClient:
+    """Get or create shared HTTP client for token refresh requests."""
+    global _refresh_http_client
+    if _refresh_http_client is None or _refresh_http_client.is_closed:
+        _refresh_http_client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+        logger.debug("Created shared HTTP client for token refresh")
+    return _refresh_http_client
+
+
+async def close_refresh_http_client() -> None:
+    """Close shared token refresh HTTP client (called on app shutdown)."""
+    global _refresh_http_client
+    if _refresh_http_client and not _refresh_http_client.is_closed:
+        await _refresh_http_client.aclose()
+        logger.debug("Closed token refresh HTTP client")
+    _refresh_http_client = None
+
+
+@functools.lru_cache(maxsize=8)
+def _read_credentials_file(path: str, mtime: float, size: int) -> Dict[str, Any]:
+    """
+    Read and parse credentials JSON file.
+
+    Cached by (path, mtime, size) so repeated loads of an unchanged file
+    skip the disk read. Callers must treat the returned dict as read-only.
+    """
+    with open(path, 'rb') as f:
+        return fast_json.loads(f.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_iso_datetime(value: str) -> datetime:
+    """Parse ISO 8601 datetime string, accepting a trailing 'Z' for UTC."""
+    if sys.version_info < (3, 11) and value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def _is_url(path: str) -> bool:
+    """Check if path is a URL."""
+    return path[:7] == 'http://' or path[:8] == 'https://'
+
+
 class AuthType(Enum):
     """Authentication type enumeration."""
     SOCIAL = "social"
@@ -83,8 +140,10 @@ class KiroAuthManager:
         ]
 
         self._access_token: Optional[str] = None
-        self._expires_at: Optional[datetime] = None
+        self._expires_at_ts: float = 0.0
         self._lock = asyncio.Lock()
+        # Incremented after every refresh, lets concurrent force_refresh calls coalesce
+        self._refresh_generation = 0
 
         self._auth_type: AuthType = AuthType.SOCIAL
 
@@ -92,7 +151,16 @@ class KiroAuthManager:
         self._api_host = get_kiro_api_host(region)
         self._q_host = get_kiro_q_host(region)
 
-        self._fingerprint = get_machine_fingerprint()
+        self._fingerprint = _MACHINE_FINGERPRINT
+
+        # Refresh request headers are static per manager (read-only)
+        self._social_headers = {
+            "Content-Type": "application/json",
+            "User-Agent": f"Kiro2API-{self._fingerprint[:16]}",
+        }
+        self._idc_headers = {
+            "Content-Type": "application/json",
+        }
 
         if creds_file:
             self._load_credentials_from_file(creds_file)
@@ -108,27 +176,32 @@ class KiroAuthManager:
             self._auth_type = AuthType.SOCIAL
             logger.debug("Using auth type: Social (Kiro Desktop)")
 
-    @staticmethod
-    def _is_url(path: str) -> bool:
-        """Check if path is a URL."""
-        return path.startswith(('http://', 'https://'))
+    def _rebind_region(self, region: str) -> None:
+        """Switch region and derive region-specific URLs (no-op if unchanged)."""
+        if region == self._region:
+            return
+        self._region = region
+        self._refresh_url = get_kiro_refresh_url(region)
+        self._api_host = get_kiro_api_host(region)
+        self._q_host = get_kiro_q_host(region)
 
     def _load_credentials_from_file(self, file_path: str) -> None:
         """Load credentials from JSON file or remote URL."""
         try:
-            if self._is_url(file_path):
+            if _is_url(file_path):
                 response = httpx.get(file_path, timeout=10.0, follow_redirects=True)
                 response.raise_for_status()
                 data = response.json()
                 logger.info(f"Credentials loaded from URL: {file_path}")
             else:
                 path = Path(file_path).expanduser()
-                if not path.exists():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
                     logger.warning(f"Credentials file not found: {file_path}")
                     return
 
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _read_credentials_file(str(path), stat.st_mtime, stat.st_size)
                 logger.info(f"Credentials loaded from file: {file_path}")
 
             if 'refreshToken' in data:
@@ -138,10 +211,7 @@ class KiroAuthManager:
             if 'profileArn' in data:
                 self._profile_arn = data['profileArn']
             if 'region' in data:
-                self._region = data['region']
-                self._refresh_url = get_kiro_refresh_url(self._region)
-                self._api_host = get_kiro_api_host(self._region)
-                self._q_host = get_kiro_q_host(self._region)
+                self._rebind_region(data['region'])
 
             if 'clientId' in data:
                 self._client_id = data['clientId']
@@ -150,11 +220,7 @@ class KiroAuthManager:
 
             if 'expiresAt' in data:
                 try:
-                    expires_str = data['expiresAt']
-                    if expires_str.endswith('Z'):
-                        self._expires_at = datetime.fromisoformat(expires_str.replace('Z', '+00:00'))
-                    else:
-                        self._expires_at = datetime.fromisoformat(expires_str)
+                    self._expires_at_ts = _parse_iso_datetime(data['expiresAt']).timestamp()
                 except Exception as e:
                     logger.warning(f"Failed to parse expiresAt: {e}")
 
@@ -180,20 +246,20 @@ class KiroAuthManager:
 
             existing_data = {}
             if path.exists():
-                with open(path, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                with open(path, 'rb') as f:
+                    existing_data = fast_json.loads(f.read())
 
             existing_data['accessToken'] = access_token if access_token is not None else self._access_token
             existing_data['refreshToken'] = refresh_token if refresh_token is not None else self._refresh_token
-            if self._expires_at:
-                existing_data['expiresAt'] = self._expires_at.isoformat()
+            if self._expires_at_ts:
+                existing_data['expiresAt'] = self._expires_at_iso()
             if profile_arn is not None:
                 existing_data['profileArn'] = profile_arn
             elif self._profile_arn:
                 existing_data['profileArn'] = self._profile_arn
 
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, indent=2, ensure_ascii=False)
+            with open(path, 'wb') as f:
+                f.write(fast_json.dumps_bytes(existing_data, indent=True))
 
             logger.debug(f"Credentials saved to {self._creds_file}")
 
@@ -202,13 +268,14 @@ class KiroAuthManager:
 
     def is_token_expiring_soon(self) -> bool:
         """Check if token is expiring soon."""
-        if not self._expires_at:
+        if not self._expires_at_ts:
             return True
 
-        now = datetime.now(timezone.utc)
-        threshold = now.timestamp() + settings.token_refresh_threshold
+        return self._expires_at_ts <= time.time() + settings.token_refresh_threshold
 
-        return self._expires_at.timestamp() <= threshold
+    def _expires_at_iso(self) -> str:
+        """Format token expiration time as ISO 8601 string (UTC)."""
+        return datetime.fromtimestamp(self._expires_at_ts, tz=timezone.utc).isoformat()
 
     async def _refresh_token_request(self) -> None:
         """Execute token refresh request."""
@@ -225,12 +292,8 @@ class KiroAuthManager:
         logger.info("Refreshing token via Social (Kiro Desktop Auth)...")
 
         payload = {'refreshToken': self._refresh_token}
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": f"Kiro2API-{self._fingerprint[:16]}",
-        }
 
-        data = await self._execute_refresh_request(self._refresh_url, json_data=payload, headers=headers)
+        data = await self._execute_refresh_request(self._refresh_url, json_data=payload, headers=self._social_headers)
         self._process_refresh_response(data)
 
     async def _refresh_token_idc(self) -> None:
@@ -252,11 +315,7 @@ class KiroAuthManager:
             "refreshToken": self._refresh_token,
         }
 
-        headers = {
-            "Content-Type": "application/json",
-        }
-
-        data = await self._execute_refresh_request(url, json_data=json_data, headers=headers)
+        data = await self._execute_refresh_request(url, json_data=json_data, headers=self._idc_headers)
         self._process_refresh_response(data)
 
     async def _execute_refresh_request(
@@ -271,15 +330,16 @@ class KiroAuthManager:
         base_delay = 1.0
         last_error = None
 
+        client = _get_refresh_http_client()
+
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient(timeout=30) as client:
-                    if json_data:
-                        response = await client.post(url, json=json_data, headers=headers)
-                    else:
-                        response = await client.post(url, data=form_data, headers=headers)
-                    response.raise_for_status()
-                    return response.json()
+                if json_data:
+                    response = await client.post(url, json=json_data, headers=headers)
+                else:
+                    response = await client.post(url, data=form_data, headers=headers)
+                response.raise_for_status()
+                return fast_json.loads(response.content)
             except httpx.HTTPStatusError as e:
                 last_error = e
                 if e.response.status_code in (429, 500, 502, 503, 504):
@@ -313,11 +373,7 @@ class KiroAuthManager:
         if not new_access_token:
             raise ValueError(f"No accessToken in response: {data}")
 
-        now = datetime.now(timezone.utc).replace(microsecond=0)
-        new_expires_at = datetime.fromtimestamp(
-            now.timestamp() + expires_in - 60,
-            tz=timezone.utc
-        )
+        new_expires_at_ts = float(int(time.time()) + expires_in - 60)
 
         self._save_credentials_to_file(new_access_token, new_refresh_token, new_profile_arn)
 
@@ -326,15 +382,21 @@ class KiroAuthManager:
             self._refresh_token = new_refresh_token
         if new_profile_arn:
             self._profile_arn = new_profile_arn
-        self._expires_at = new_expires_at
+        self._expires_at_ts = new_expires_at_ts
 
-        logger.info(f"Token refreshed successfully, expires at: {self._expires_at.isoformat()}")
+        logger.info(f"Token refreshed successfully, expires at: {self._expires_at_iso()}")
 
     async def get_access_token(self) -> str:
         """Return valid access_token, refreshing if necessary."""
+        # Fast path: valid token needs no lock (double-checked below)
+        access_token = self._access_token
+        if access_token and not self.is_token_expiring_soon():
+            return access_token
+
         async with self._lock:
             if not self._access_token or self.is_token_expiring_soon():
                 await self._refresh_token_request()
+                self._refresh_generation += 1
 
             if not self._access_token:
                 raise ValueError("Failed to obtain access token")
@@ -342,9 +404,19 @@ class KiroAuthManager:
             return self._access_token
 
     async def force_refresh(self) -> str:
-        """Force token refresh."""
+        """
+        Force token refresh.
+
+        Concurrent callers (e.g. many requests hitting 403 at once) share one
+        refresh: whoever waited on the lock while another caller refreshed
+        reuses that fresh token instead of refreshing again.
+        """
+        generation = self._refresh_generation
         async with self._lock:
+            if self._refresh_generation != generation and self._access_token:
+                return self._access_token
             await self._refresh_token_request()
+            self._refresh_generation += 1
             return self._access_token
 
     @property
@@ -372,7 +444,53 @@ class KiroAuthManager:
         """Unique machine fingerprint."""
         return self._fingerprint
 
+    @property
+    def has_credentials(self) -> bool:
+        """True if a refresh or access token is configured (tokens can be obtained)."""
+        return bool(self._refresh_token or self._access_token)
+
+    @property
+    def has_valid_token(self) -> bool:
+        """True if an access token is held and not about to expire."""
+        return bool(self._access_token) and not self.is_token_expiring_soon()
+
     @property
     def auth_type(self) -> AuthType:
         """Authentication type (SOCIAL or IDC)."""
         return self._auth_type
+
+
+# Multi-tenant managers keyed by refresh token digest, least recently used first
+_TENANT_MANAGERS: "OrderedDict[bytes, KiroAuthManager]" = OrderedDict()
+
+
+def get_tenant_auth_manager(refresh_token: str) -> KiroAuthManager:
+    """
+    Get the auth manager for a multi-tenant refresh token.
+
+    Managers are reused across requests (LRU, TENANT_AUTH_CACHE_SIZE entries),
+    so a tenant's access token is refreshed once and then served from memory
+    instead of on every request. No await happens here, so the lookup and
+    insert cannot interleave between coroutines.
+
+    Args:
+        refresh_token: Refresh token supplied by the client
+
+    Returns:
+        KiroAuthManager bound to the refresh token
+    """
+    key = hashlib.blake2b(refresh_token.encode("utf-8"), digest_size=16).digest()
+    manager = _TENANT_MANAGERS.get(key)
+    if manager is not None:
+        _TENANT_MANAGERS.move_to_end(key)
+        return manager
+
+    manager = KiroAuthManager(
+        refresh_token=refresh_token,
+        region=settings.region,
+        profile_arn=settings.profile_arn
+    )
+    _TENANT_MANAGERS[key] = manager
+    while len(_TENANT_MANAGERS) > settings.tenant_auth_cache_size:
+        _TENANT_MANAGERS.popitem(last=False)
+    return manager
@@ -7,6 +7,7 @@ Thread-safe storage with TTL, lazy loading and background refresh.
 
 import asyncio
 import time
+from itertools import islice
 from typing import Any, Dict, List, Optional
 
 import httpx
@@ -14,6 +15,12 @@ from loguru import logger
 
 from app.core.config import settings
 from app.libs.http_client import global_http_client_manager
+from app.utils import fast_json
+from app.utils.helpers import get_kiro_headers
+
+# Opportunistic refreshes (schedule_refresh) are skipped for this long after a
+# failed attempt, so reads during an upstream outage do not retry every time
+_REFRESH_FAILURE_COOLDOWN: float = 60.0
 
 
 class ModelInfoCache:
@@ -24,35 +31,84 @@ class ModelInfoCache:
     Supports background auto-refresh mechanism.
     """
 
-    def __init__(self, cache_ttl: int = None):
+    def __init__(self, cache_ttl: int = None, max_size: int = None):
         """Initialize model cache."""
         self._cache: Dict[str, Dict[str, Any]] = {}
-        self._lock = asyncio.Lock()
+        self._max_input_tokens: Dict[str, int] = {}
         self._last_update: Optional[float] = None
+        # Monotonic twin of _last_update for age checks (immune to wall-clock steps)
+        self._last_update_mono: Optional[float] = None
         self._cache_ttl = cache_ttl or settings.model_cache_ttl
+        self._max_size = max_size or settings.model_cache_max_size
         self._refresh_task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._revalidate_task: Optional[asyncio.Task] = None
+        self._hits_since_refresh = 0
         self._auth_manager = None
+        self._last_failure_mono: Optional[float] = None
 
     def set_auth_manager(self, auth_manager) -> None:
         """Set authentication manager (for background refresh)."""
         self._auth_manager = auth_manager
 
-    async def update(self, models_data: List[Dict[str, Any]]) -> None:
-        """Update model cache."""
-        async with self._lock:
-            logger.info(f"Updating model cache. Found {len(models_data)} models.")
-            self._cache = {model["modelId"]: model for model in models_data}
-            self._last_update = time.time()
+    def update(self, models_data: List[Dict[str, Any]]) -> None:
+        """
+        Update model cache.
+
+        Builds the new mapping first and swaps it in with a single
+        assignment, so readers never see a partially built cache.
+        """
+        logger.info(f"Updating model cache. Found {len(models_data)} models.")
+        new_cache = {model["modelId"]: model for model in models_data}
+        if len(new_cache) > self._max_size:
+            logger.warning(f"Model list exceeds cache size limit ({len(new_cache)} > {self._max_size}), truncating")
+            new_cache = dict(islice(new_cache.items(), self._max_size))
+        default_limit = settings.default_max_input_tokens
+        new_limits = {
+            model_id: (model.get("tokenLimits") or {}).get("maxInputTokens") or default_limit
+            for model_id, model in new_cache.items()
+        }
+        self._cache = new_cache
+        self._max_input_tokens = new_limits
+        self._last_update = time.time()
+        self._last_update_mono = time.monotonic()
 
     async def refresh(self) -> bool:
-        """Refresh cache from API using global connection pool."""
+        """
+        Refresh cache from API using global connection pool.
+
+        Concurrent callers share a single in-flight request (single-flight).
+        """
+        inflight = self._inflight
+        if inflight is not None and not inflight.done():
+            return await asyncio.shield(inflight)
+
+        # No await between the check above and this assignment, so only one
+        # coroutine can become the leader
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight = fut
+        try:
+            result = await self._refresh_from_api()
+        except asyncio.CancelledError:
+            # Only the leader was cancelled; followers see a failed refresh
+            fut.set_result(False)
+            raise
+        finally:
+            self._inflight = None
+
+        if not result:
+            self._last_failure_mono = time.monotonic()
+        fut.set_result(result)
+        return result
+
+    async def _refresh_from_api(self) -> bool:
+        """Fetch model list from API and update cache."""
         if not self._auth_manager:
             logger.warning("No auth manager set, cannot refresh cache")
             return False
 
         try:
             token = await self._auth_manager.get_access_token()
-            from app.utils.helpers import get_kiro_headers
             headers = get_kiro_headers(self._auth_manager, token)
 
             client = await global_http_client_manager.get_client()
@@ -67,9 +123,9 @@ class ModelInfoCache:
             )
 
             if response.status_code == 200:
-                data = response.json()
+                data = fast_json.loads(response.content)
                 models_list = data.get("models", [])
-                await self.update(models_list)
+                self.update(models_list)
                 logger.info(f"Successfully refreshed model cache with {len(models_list)} models")
                 return True
             else:
@@ -101,14 +157,28 @@ class ModelInfoCache:
                 logger.error(f"Error stopping refresh task: {e}")
 
     async def _background_refresh_loop(self) -> None:
-        """Background refresh loop."""
+        """
+        Background refresh loop.
+
+        Interval adapts to access pattern: it shrinks toward TTL/4 while the
+        cache is being read and grows up to TTL when idle (idle cycles skip
+        the refresh entirely).
+        """
+        min_interval = self._cache_ttl / 4
+        max_interval = self._cache_ttl
         refresh_interval = self._cache_ttl / 2
-        logger.info(f"Background refresh will run every {refresh_interval} seconds")
+        logger.info(f"Background refresh will run every {refresh_interval} seconds (adaptive)")
 
         while True:
             try:
                 await asyncio.sleep(refresh_interval)
+                if self._hits_since_refresh == 0 and not self.is_empty():
+                    refresh_interval = min(max_interval, refresh_interval * 2)
+                    logger.debug("Model cache not accessed since last refresh, skipping scheduled refresh")
+                    continue
+                refresh_interval = max(min_interval, refresh_interval / 2)
                 logger.debug("Running scheduled model cache refresh")
+                self._hits_since_refresh = 0
                 await self.refresh()
             except asyncio.CancelledError:
                 logger.info("Background refresh task cancelled")
@@ -117,15 +187,39 @@ class ModelInfoCache:
                 logger.error(f"Unexpected error in background refresh: {e}")
 
     def get(self, model_id: str) -> Optional[Dict[str, Any]]:
-        """Get model info."""
+        """
+        Get model info with stale-while-revalidate semantics.
+
+        Returns the current (possibly stale) value immediately and schedules
+        a background refresh if the cache is stale.
+        """
+        self._hits_since_refresh += 1
+        if self.is_stale():
+            self.schedule_refresh()
         return self._cache.get(model_id)
 
+    def schedule_refresh(self) -> None:
+        """
+        Schedule a fire-and-forget refresh unless one is already in flight.
+
+        Bursts of callers on an empty or stale cache start at most one task;
+        the rest return immediately and keep serving the current data.
+        Nothing is scheduled without usable global credentials (multi-tenant
+        only mode) or within _REFRESH_FAILURE_COOLDOWN of a failed attempt.
+        """
+        if not self._auth_manager or not self._auth_manager.has_credentials or self.is_refreshing:
+            return
+        last_failure = self._last_failure_mono
+        if last_failure is not None and time.monotonic() - last_failure < _REFRESH_FAILURE_COOLDOWN:
+            return
+        self._revalidate_task = asyncio.create_task(self.refresh())
+
     def get_max_input_tokens(self, model_id: str) -> int:
-        """Get model's maxInputTokens."""
-        model = self._cache.get(model_id)
-        if model and model.get("tokenLimits"):
-            return model["tokenLimits"].get("maxInputTokens") or settings.default_max_input_tokens
-        return settings.default_max_input_tokens
+        """Get model's maxInputTokens (stale-while-revalidate, like get())."""
+        self._hits_since_refresh += 1
+        if self.is_stale():
+            self.schedule_refresh()
+        return self._max_input_tokens.get(model_id, settings.default_max_input_tokens)
 
     def is_empty(self) -> bool:
         """Check if cache is empty."""
@@ -133,9 +227,9 @@ class ModelInfoCache:
 
     def is_stale(self) -> bool:
         """Check if cache is stale."""
-        if not self._last_update:
+        if self._last_update_mono is None:
             return True
-        return time.time() - self._last_update > self._cache_ttl
+        return time.monotonic() - self._last_update_mono > self._cache_ttl
 
     def get_all_model_ids(self) -> List[str]:
         """Return all model IDs in cache."""
@@ -146,6 +240,20 @@ class ModelInfoCache:
         """Number of models in cache."""
         return len(self._cache)
 
+    @property
+    def is_refreshing(self) -> bool:
+        """True while a refresh (scheduled or direct) is in flight."""
+        inflight = self._inflight
+        if inflight is not None and not inflight.done():
+            return True
+        task = self._revalidate_task
+        return task is not None and not task.done()
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the cache has been populated at least once."""
+        return self._last_update is not None
+
     @property
     def last_update_time(self) -> Optional[float]:
         """Last update timestamp (seconds) or None."""
@@ -9,7 +9,8 @@ Contains functions for:
 - Assembling complete request payload
 """
 
-import json
+import re
+from itertools import chain, groupby
 from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
@@ -24,8 +25,11 @@ from app.models.schemas import (
     ChatMessage,
     ChatCompletionRequest,
     Tool,
-    ToolFunction,
 )
+from app.utils import fast_json
+
+# "data:<media_type>[;params],<payload>" - group 1 is media type, payload follows match end
+_DATA_URL_RE: re.Pattern = re.compile(r"data:([^;,]*)[^,]*,")
 
 
 def get_thinking_system_prompt_addition() -> str:
@@ -87,24 +91,100 @@ def extract_text_content(content: Any) -> str:
     Returns:
         Extracted text or empty string
     """
-    if content is None:
-        return ""
     if isinstance(content, str):
         return content
+    if content is None:
+        return ""
     if isinstance(content, list):
-        text_parts = []
-        for item in content:
-            if isinstance(item, dict):
-                if item.get("type") == "text":
-                    text_parts.append(item.get("text", ""))
-                elif "text" in item:
-                    text_parts.append(item["text"])
-            elif isinstance(item, str):
-                text_parts.append(item)
-        return "".join(text_parts)
+        return "".join(_text_of(item) for item in content)
     return str(content)
 
 
+def _text_of(item: Any) -> str:
+    """Text of a single content block (plain string or dict with "text" key)."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        return item.get("text", "")
+    return ""
+
+
+def _parse_data_url(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Split data URL into media type and payload.
+
+    Args:
+        url: Data URL (e.g. "data:image/jpeg;base64,...")
+
+    Returns:
+        Tuple of (media_type, data) or None if URL is malformed
+    """
+    match = _DATA_URL_RE.match(url)
+    if match is None:
+        return None
+    return match.group(1), url[match.end():]
+
+
+def _as_dict(item: Any) -> Optional[Dict[str, Any]]:
+    """
+    Return plain dict view of content item (dict, Pydantic model or object).
+
+    Content blocks are normalized once here so downstream code only uses
+    dict.get() instead of mixing attribute and key access.
+    """
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, str):
+        return None
+    model_dump = getattr(item, "model_dump", None)
+    if model_dump is not None:
+        return model_dump()
+    if hasattr(item, "__dict__"):
+        return vars(item)
+    return None
+
+
+def _image_from_openai_block(block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """OpenAI format: {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,..."}}"""
+    image_url_obj = _as_dict(block.get("image_url")) or {}
+    url = image_url_obj.get("url") or ""
+
+    if url.startswith("data:"):
+        parsed = _parse_data_url(url)
+        if parsed is None:
+            logger.warning("Failed to parse image data URL: missing ',' separator")
+        elif parsed[1]:
+            return {"media_type": parsed[0], "data": parsed[1], "_stripped": True}
+    elif url.startswith("http"):
+        logger.warning(f"URL-based images are not supported, skipping: {url[:80]}...")
+
+    return None
+
+
+def _image_from_anthropic_block(block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Anthropic format: {"type": "image", "source": {"type": "base64", "media_type": "...", "data": "..."}}"""
+    source = _as_dict(block.get("source"))
+    if source is None:
+        return None
+
+    source_type = source.get("type")
+    if source_type == "base64":
+        data = source.get("data", "")
+        if data:
+            return {"media_type": source.get("media_type", "image/jpeg"), "data": data}
+    elif source_type == "url":
+        url = source.get("url", "")
+        logger.warning(f"URL-based images are not supported, skipping: {url[:80]}...")
+
+    return None
+
+
+_IMAGE_HANDLERS = {
+    "image_url": _image_from_openai_block,
+    "image": _image_from_anthropic_block,
+}
+
+
 def extract_images_from_content(content: Any) -> List[Dict[str, Any]]:
     """
     Extract images from message content in unified format.
@@ -125,79 +205,17 @@ def extract_images_from_content(content: Any) -> List[Dict[str, Any]]:
         return images
 
     for item in content:
-        if isinstance(item, dict):
-            item_type = item.get("type")
-        elif hasattr(item, "type"):
-            item_type = item.type
-        else:
+        block = _as_dict(item)
+        if block is None:
             continue
 
-        # OpenAI format: {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,..."}}
-        if item_type == "image_url":
-            if isinstance(item, dict):
-                image_url_obj = item.get("image_url", {})
-            else:
-                image_url_obj = getattr(item, "image_url", {})
-
-            if isinstance(image_url_obj, dict):
-                url = image_url_obj.get("url", "")
-            elif hasattr(image_url_obj, "url"):
-                url = image_url_obj.url
-            else:
-                url = ""
-
-            if url.startswith("data:"):
-                try:
-                    header, data = url.split(",", 1)
-                    media_part = header.split(";")[0]
-                    media_type = media_part.replace("data:", "")
-
-                    if data:
-                        images.append({
-                            "media_type": media_type,
-                            "data": data
-                        })
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Failed to parse image data URL: {e}")
-            elif url.startswith("http"):
-                logger.warning(f"URL-based images are not supported, skipping: {url[:80]}...")
-
-        # Anthropic format: {"type": "image", "source": {"type": "base64", "media_type": "...", "data": "..."}}
-        elif item_type == "image":
-            source = item.get("source", {}) if isinstance(item, dict) else getattr(item, "source", None)
-
-            if source is None:
-                continue
+        handler = _IMAGE_HANDLERS.get(block.get("type"))
+        if handler is None:
+            continue
 
-            if isinstance(source, dict):
-                source_type = source.get("type")
-
-                if source_type == "base64":
-                    media_type = source.get("media_type", "image/jpeg")
-                    data = source.get("data", "")
-
-                    if data:
-                        images.append({
-                            "media_type": media_type,
-                            "data": data
-                        })
-                elif source_type == "url":
-                    url = source.get("url", "")
-                    logger.warning(f"URL-based images are not supported, skipping: {url[:80]}...")
-
-            elif hasattr(source, "type"):
-                if source.type == "base64":
-                    media_type = getattr(source, "media_type", "image/jpeg")
-                    data = getattr(source, "data", "")
-
-                    if data:
-                        images.append({
-                            "media_type": media_type,
-                            "data": data
-                        })
-                elif source.type == "url":
-                    url = getattr(source, "url", "")
-                    logger.warning(f"URL-based images are not supported, skipping: {url[:80]}...")
+        image = handler(block)
+        if image:
+            images.append(image)
 
     if images:
         logger.debug(f"Extracted {len(images)} image(s) from content")
@@ -205,6 +223,73 @@ def extract_images_from_content(content: Any) -> List[Dict[str, Any]]:
     return images
 
 
+def _parse_content_blocks(content: Any) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Parse message content in a single pass.
+
+    Collects text (as extract_text_content), images (as
+    extract_images_from_content) and tool results, walking the content list once.
+
+    Args:
+        content: Message content in any supported format
+
+    Returns:
+        Tuple of (text, images, tool_results)
+    """
+    if not isinstance(content, list):
+        return extract_text_content(content), [], []
+
+    text_parts: List[str] = []
+    images: List[Dict[str, Any]] = []
+    tool_results: List[Dict[str, Any]] = []
+
+    for item in content:
+        if isinstance(item, str):
+            text_parts.append(item)
+            continue
+
+        block = _as_dict(item)
+        if block is None:
+            continue
+
+        block_type = block.get("type")
+        if "text" in block:
+            text_parts.append(block["text"])
+        if block_type == "tool_result":
+            tool_results.append({
+                "content": [{"text": extract_text_content(block.get("content", ""))}],
+                "status": "success",
+                "toolUseId": block.get("tool_use_id", "")
+            })
+
+        handler = _IMAGE_HANDLERS.get(block_type)
+        if handler is not None:
+            image = handler(block)
+            if image:
+                images.append(image)
+
+    if images:
+        logger.debug(f"Extracted {len(images)} image(s) from content")
+
+    return "".join(text_parts), images, tool_results
+
+
+def _parse_message(msg: ChatMessage) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Parse message content, reusing the result cached on the message.
+
+    The cache is keyed by content identity, so reassigning msg.content
+    (e.g. when merging or prepending the system prompt) invalidates it.
+    """
+    cached = msg._parsed
+    if cached is not None and cached[0] is msg.content:
+        return cached[1]
+
+    parsed = _parse_content_blocks(msg.content)
+    msg._parsed = (msg.content, parsed)
+    return parsed
+
+
 def convert_images_to_kiro_format(images: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     """
     Convert unified images to Kiro API format.
@@ -212,6 +297,9 @@ def convert_images_to_kiro_format(images: Optional[List[Dict[str, Any]]]) -> Lis
     Unified format: [{"media_type": "image/jpeg", "data": "base64..."}]
     Kiro format: [{"format": "jpeg", "source": {"bytes": "base64..."}}]
 
+    Images marked with "_stripped" (data URL prefix already removed by
+    extract_images_from_content) skip the data URL check.
+
     Args:
         images: List of images in unified format
 
@@ -230,17 +318,15 @@ def convert_images_to_kiro_format(images: Optional[List[Dict[str, Any]]]) -> Lis
             logger.warning("Skipping image with empty data")
             continue
 
-        if data.startswith("data:"):
-            try:
-                header, actual_data = data.split(",", 1)
-                media_part = header.split(";")[0]
-                extracted_media_type = media_part.replace("data:", "")
+        if not img.get("_stripped") and data.startswith("data:"):
+            parsed = _parse_data_url(data)
+            if parsed is None:
+                logger.warning("Failed to parse data URL prefix: missing ',' separator")
+            else:
+                extracted_media_type, data = parsed
                 if extracted_media_type:
                     media_type = extracted_media_type
-                data = actual_data
                 logger.debug(f"Stripped data URL prefix, extracted media_type: {media_type}")
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Failed to parse data URL prefix: {e}")
 
         format_str = media_type.split("/")[-1] if "/" in media_type else media_type
 
@@ -275,6 +361,8 @@ def merge_adjacent_messages(messages: List[ChatMessage]) -> List[ChatMessage]:
     if not messages:
         return []
 
+    # Tool result messages are built from already validated data, so
+    # model_construct is used to skip re-validating their content lists
     processed = []
     pending_tool_results = []
 
@@ -289,7 +377,7 @@ def merge_adjacent_messages(messages: List[ChatMessage]) -> List[ChatMessage]:
             logger.debug(f"Collected tool result for tool_call_id={msg.tool_call_id}")
         else:
             if pending_tool_results:
-                tool_results_msg = ChatMessage(
+                tool_results_msg = ChatMessage.model_construct(
                     role="user",
                     content=pending_tool_results.copy()
                 )
@@ -300,7 +388,7 @@ def merge_adjacent_messages(messages: List[ChatMessage]) -> List[ChatMessage]:
             processed.append(msg)
 
     if pending_tool_results:
-        tool_results_msg = ChatMessage(
+        tool_results_msg = ChatMessage.model_construct(
             role="user",
             content=pending_tool_results.copy()
         )
@@ -308,33 +396,39 @@ def merge_adjacent_messages(messages: List[ChatMessage]) -> List[ChatMessage]:
         logger.debug(f"Created final user message with {len(pending_tool_results)} tool results")
 
     merged = []
-    for msg in processed:
-        if not merged:
-            merged.append(msg)
+    for role, group in groupby(processed, key=lambda m: m.role):
+        items = list(group)
+        first = items[0]
+        merged.append(first)
+        if len(items) == 1:
             continue
 
-        last = merged[-1]
-        if msg.role == last.role:
-            if isinstance(last.content, list) and isinstance(msg.content, list):
-                last.content = last.content + msg.content
-            elif isinstance(last.content, list):
-                last.content = last.content + [{"type": "text", "text": extract_text_content(msg.content)}]
-            elif isinstance(msg.content, list):
-                last.content = [{"type": "text", "text": extract_text_content(last.content)}] + msg.content
-            else:
-                last_text = extract_text_content(last.content)
-                current_text = extract_text_content(msg.content)
-                last.content = f"{last_text}\n{current_text}"
+        if not any(isinstance(m.content, list) for m in items):
+            first.content = "\n".join(extract_text_content(m.content) for m in items)
+        else:
+            # Leading non-list contents are joined into one text block, later ones
+            # become separate text blocks (same result as pairwise merging)
+            lead = 0
+            while not isinstance(items[lead].content, list):
+                lead += 1
+            blocks = []
+            if lead:
+                blocks.append({
+                    "type": "text",
+                    "text": "\n".join(extract_text_content(m.content) for m in items[:lead])
+                })
+            blocks.extend(chain.from_iterable(
+                m.content if isinstance(m.content, list)
+                else [{"type": "text", "text": extract_text_content(m.content)}]
+                for m in items[lead:]
+            ))
+            first.content = blocks
 
-            if msg.role == "assistant" and msg.tool_calls:
-                if last.tool_calls is None:
-                    last.tool_calls = []
-                last.tool_calls = list(last.tool_calls) + list(msg.tool_calls)
-                logger.debug(f"Merged tool_calls: added {len(msg.tool_calls)} tool calls, total now: {len(last.tool_calls)}")
+        if role == "assistant" and any(m.tool_calls for m in items[1:]):
+            first.tool_calls = list(chain.from_iterable(m.tool_calls or [] for m in items))
+            logger.debug(f"Merged tool_calls: total now: {len(first.tool_calls)}")
 
-            logger.debug(f"Merged adjacent messages with role {msg.role}")
-        else:
-            merged.append(msg)
+        logger.debug(f"Merged {len(items)} adjacent messages with role {role}")
 
     return merged
 
@@ -357,7 +451,7 @@ def build_kiro_history(messages: List[ChatMessage], model_id: str) -> List[Dict[
 
     for msg in messages:
         if msg.role == "user":
-            content = extract_text_content(msg.content)
+            content, images, tool_results = _parse_message(msg)
 
             user_input = {
                 "content": content,
@@ -365,21 +459,19 @@ def build_kiro_history(messages: List[ChatMessage], model_id: str) -> List[Dict[
                 "origin": "AI_EDITOR",
             }
 
-            images = extract_images_from_content(msg.content)
             if images:
                 kiro_images = convert_images_to_kiro_format(images)
                 if kiro_images:
                     user_input["images"] = kiro_images
                     logger.debug(f"Added {len(kiro_images)} image(s) to user message in history")
 
-            tool_results = _extract_tool_results(msg.content)
             if tool_results:
                 user_input["userInputMessageContext"] = {"toolResults": tool_results}
 
             history.append({"userInputMessage": user_input})
 
         elif msg.role == "assistant":
-            content = extract_text_content(msg.content)
+            content = _parse_message(msg)[0]
 
             assistant_response = {"content": content}
 
@@ -395,42 +487,30 @@ def build_kiro_history(messages: List[ChatMessage], model_id: str) -> List[Dict[
     return history
 
 
-def _extract_tool_results(content: Any) -> List[Dict[str, Any]]:
-    """Extract tool results from message content."""
-    tool_results = []
-
-    if isinstance(content, list):
-        for item in content:
-            if isinstance(item, dict) and item.get("type") == "tool_result":
-                tool_results.append({
-                    "content": [{"text": extract_text_content(item.get("content", ""))}],
-                    "status": "success",
-                    "toolUseId": item.get("tool_use_id", "")
-                })
-
-    return tool_results
-
-
 def _extract_tool_uses(msg: ChatMessage) -> List[Dict[str, Any]]:
     """Extract tool uses from assistant message."""
     tool_uses = []
 
     if msg.tool_calls:
-        for tc in msg.tool_calls:
-            if isinstance(tc, dict):
-                tool_uses.append({
-                    "name": tc.get("function", {}).get("name", ""),
-                    "input": json.loads(tc.get("function", {}).get("arguments", "{}")),
-                    "toolUseId": tc.get("id", "")
-                })
+        for item in msg.tool_calls:
+            tc = _as_dict(item)
+            if tc is None:
+                continue
+            function = _as_dict(tc.get("function")) or {}
+            tool_uses.append({
+                "name": function.get("name", ""),
+                "input": fast_json.loads(function.get("arguments") or "{}"),
+                "toolUseId": tc.get("id", "")
+            })
 
     if isinstance(msg.content, list):
         for item in msg.content:
-            if isinstance(item, dict) and item.get("type") == "tool_use":
+            block = _as_dict(item)
+            if block is not None and block.get("type") == "tool_use":
                 tool_uses.append({
-                    "name": item.get("name", ""),
-                    "input": item.get("input", {}),
-                    "toolUseId": item.get("id", "")
+                    "name": block.get("name", ""),
+                    "input": block.get("input", {}),
+                    "toolUseId": block.get("id", "")
                 })
 
     return tool_uses
@@ -457,7 +537,8 @@ def process_tools_with_long_descriptions(
     if not tools:
         return None, ""
 
-    if settings.tool_description_max_length <= 0:
+    max_len = settings.tool_description_max_length
+    if max_len <= 0:
         return tools, ""
 
     tool_documentation_parts = []
@@ -470,13 +551,13 @@ def process_tools_with_long_descriptions(
 
         description = tool.function.description or ""
 
-        if len(description) <= settings.tool_description_max_length:
+        if len(description) <= max_len:
             processed_tools.append(tool)
         else:
             tool_name = tool.function.name
 
             logger.debug(
-                f"Tool '{tool_name}' has long description ({len(description)} chars > {settings.tool_description_max_length}), "
+                f"Tool '{tool_name}' has long description ({len(description)} chars > {max_len}), "
                 f"moving to system prompt"
             )
 
@@ -484,24 +565,24 @@ def process_tools_with_long_descriptions(
 
             reference_description = f"[Full documentation in system prompt under '## Tool: {tool_name}']"
 
-            processed_tool = Tool(
-                type=tool.type,
-                function=ToolFunction(
-                    name=tool.function.name,
-                    description=reference_description,
-                    parameters=tool.function.parameters
-                )
-            )
+            # model_copy skips re-validating the (possibly large) parameters schema
+            processed_tool = tool.model_copy(update={
+                "function": tool.function.model_copy(update={"description": reference_description})
+            })
             processed_tools.append(processed_tool)
 
     tool_documentation = ""
     if tool_documentation_parts:
-        tool_documentation = (
+        chunks = [
             "\n\n---\n"
             "# Tool Documentation\n"
             "The following tools have detailed documentation that couldn't fit in the tool definition.\n\n"
-            + "\n\n---\n\n".join(tool_documentation_parts)
-        )
+        ]
+        for i, part in enumerate(tool_documentation_parts):
+            if i:
+                chunks.append("\n\n---\n\n")
+            chunks.append(part)
+        tool_documentation = "".join(chunks)
 
     return processed_tools if processed_tools else None, tool_documentation
 
@@ -513,14 +594,14 @@ def _extract_system_and_tool_docs(
     """Extract system prompt and tool documentation."""
     processed_tools, tool_documentation = process_tools_with_long_descriptions(tools)
 
-    system_prompt = ""
+    system_parts = []
     non_system_messages = []
     for msg in messages:
         if msg.role == "system":
-            system_prompt += extract_text_content(msg.content) + "\n"
+            system_parts.append(_parse_message(msg)[0])
         else:
             non_system_messages.append(msg)
-    system_prompt = system_prompt.strip()
+    system_prompt = "\n".join(system_parts).strip()
 
     if tool_documentation:
         system_prompt = system_prompt + tool_documentation if system_prompt else tool_documentation.strip()
@@ -575,13 +656,13 @@ def build_kiro_payload(
     if system_prompt and history_messages:
         first_msg = history_messages[0]
         if first_msg.role == "user":
-            original_content = extract_text_content(first_msg.content)
+            original_content = _parse_message(first_msg)[0]
             first_msg.content = f"{system_prompt}\n\n{original_content}"
 
     history = build_kiro_history(history_messages, model_id)
 
     current_message = merged_messages[-1]
-    current_content = extract_text_content(current_message.content)
+    current_content, current_images, current_tool_results = _parse_message(current_message)
 
     if system_prompt and not history:
         current_content = f"{system_prompt}\n\n{current_content}"
@@ -600,47 +681,55 @@ def build_kiro_payload(
     if current_message.role == "user":
         current_content = inject_thinking_tags(current_content)
 
-    user_input_message = {
-        "content": current_content,
-        "modelId": model_id,
-        "origin": "AI_EDITOR",
-    }
-
-    if current_message.role != "assistant":
-        current_images = extract_images_from_content(current_message.content)
-        if current_images:
-            kiro_images = convert_images_to_kiro_format(current_images)
-            if kiro_images:
-                user_input_message["images"] = kiro_images
-                logger.debug(f"Added {len(kiro_images)} image(s) to current message")
-
-    user_input_context = _build_user_input_context(request_data, current_message, processed_tools)
-    if user_input_context:
-        user_input_message["userInputMessageContext"] = user_input_context
-
-    payload = {
-        "conversationState": {
-            "chatTriggerType": "MANUAL",
-            "conversationId": conversation_id,
-            "currentMessage": {
-                "userInputMessage": user_input_message
-            }
-        }
-    }
+    kiro_images = None
+    if current_message.role != "assistant" and current_images:
+        kiro_images = convert_images_to_kiro_format(current_images) or None
+        if kiro_images:
+            logger.debug(f"Added {len(kiro_images)} image(s) to current message")
 
-    if history:
-        payload["conversationState"]["history"] = history
+    user_input_context = _build_user_input_context(
+        request_data, current_message, processed_tools, current_tool_results
+    )
 
+    # Optional keys are resolved up front so each dict is built in one go
+    user_input_message = {k: v for k, v in (
+        ("content", current_content),
+        ("modelId", model_id),
+        ("origin", "AI_EDITOR"),
+        ("images", kiro_images),
+        ("userInputMessageContext", user_input_context or None),
+    ) if v is not None}
+
+    conversation_state = {k: v for k, v in (
+        ("chatTriggerType", "MANUAL"),
+        ("conversationId", conversation_id),
+        ("currentMessage", {"userInputMessage": user_input_message}),
+        ("history", history or None),
+    ) if v is not None}
+
+    payload = {"conversationState": conversation_state}
     if profile_arn:
         payload["profileArn"] = profile_arn
 
     return payload
 
 
+def _get_tool_spec(tool: Tool) -> Dict[str, Any]:
+    """Get Kiro toolSpecification for tool (references the tool's parameters schema)."""
+    return {
+        "toolSpecification": {
+            "name": tool.function.name,
+            "description": tool.function.description or "",
+            "inputSchema": {"json": tool.function.parameters or {}}
+        }
+    }
+
+
 def _build_user_input_context(
     request_data: ChatCompletionRequest,
     current_message: ChatMessage,
-    processed_tools: Optional[List[Tool]] = None
+    processed_tools: Optional[List[Tool]] = None,
+    tool_results: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """Build userInputMessageContext for current message."""
     context = {}
@@ -648,20 +737,12 @@ def _build_user_input_context(
     tools_to_use = processed_tools if processed_tools is not None else request_data.tools
 
     if tools_to_use:
-        tools_list = []
-        for tool in tools_to_use:
-            if tool.type == "function":
-                tools_list.append({
-                    "toolSpecification": {
-                        "name": tool.function.name,
-                        "description": tool.function.description or "",
-                        "inputSchema": {"json": tool.function.parameters or {}}
-                    }
-                })
+        tools_list = [_get_tool_spec(tool) for tool in tools_to_use if tool.type == "function"]
         if tools_list:
             context["tools"] = tools_list
 
-    tool_results = _extract_tool_results(current_message.content)
+    if tool_results is None:
+        tool_results = _parse_message(current_message)[2]
     if tool_results:
         context["toolResults"] = tool_results
 
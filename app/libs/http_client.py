@@ -7,60 +7,183 @@ Supports adaptive timeout for slow models (like Opus).
 """
 
 import asyncio
-from typing import Optional
+import math
+import random
+import threading
+import uuid
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
 from fastapi import HTTPException
 from loguru import logger
 
-from app.libs.auth import KiroAuthManager
+from app.libs.auth import KiroAuthManager, close_refresh_http_client
 from app.core.config import settings, get_adaptive_timeout
+from app.utils import fast_json
 from app.utils.helpers import get_kiro_headers
 
+try:
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+except ImportError:
+    h2 = None
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+USE_HTTP2: bool = settings.enable_http2 and h2 is not None
+
 
 class GlobalHTTPClientManager:
     """
     Global HTTP client manager.
 
     Maintains a global connection pool to avoid creating new clients for each request.
+    Clients are cached per event loop, since an httpx.AsyncClient cannot be
+    shared across loops (tests, workers creating new loops, etc.).
     """
 
     def __init__(self):
         """Initialize global client manager."""
-        self._client: Optional[httpx.AsyncClient] = None
-        self._lock = asyncio.Lock()
+        # id(loop) -> (loop, client). The loop is kept alongside its client so an
+        # id reused by a later loop is detected by identity instead of handing
+        # out a client bound to a dead loop.
+        self._clients: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        """Create HTTP client with connection pool."""
+        limits = httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=100,
+            # Slightly above common upstream idle timeouts (nginx: 75s) so pooled
+            # TLS connections are reused between requests instead of re-handshaking
+            keepalive_expiry=75.0
+        )
+
+        client = httpx.AsyncClient(
+            timeout=None,
+            follow_redirects=True,
+            limits=limits,
+            http2=USE_HTTP2
+        )
+        logger.debug(f"Created new global HTTP client with connection pool (http2={USE_HTTP2})")
+        return client
 
     async def get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
-        async with self._lock:
-            if self._client is None or self._client.is_closed:
-                limits = httpx.Limits(
-                    max_connections=100,
-                    max_keepalive_connections=20,
-                    keepalive_expiry=60.0
-                )
-
-                self._client = httpx.AsyncClient(
-                    timeout=None,
-                    follow_redirects=True,
-                    limits=limits,
-                    http2=False
-                )
-                logger.debug("Created new global HTTP client with connection pool")
-
-            return self._client
+        """Get or create HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        loop_id = id(loop)
+
+        # Fast path: dict.get is atomic, lock only when the client must be (re)created
+        entry = self._clients.get(loop_id)
+        if entry is not None and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+
+        with self._lock:
+            entry = self._clients.get(loop_id)
+            if entry is not None and entry[0] is loop and not entry[1].is_closed:
+                return entry[1]
+            self._prune_closed_loops()
+            client = self._create_client()
+            self._clients[loop_id] = (loop, client)
+            return client
+
+    def _prune_closed_loops(self) -> None:
+        """
+        Drop clients whose event loop has closed (caller holds the lock).
+
+        Their connections died with the loop and aclose() can no longer run
+        there, so the entries are only released for garbage collection.
+        """
+        stale = [loop_id for loop_id, (loop, _) in self._clients.items() if loop.is_closed()]
+        for loop_id in stale:
+            del self._clients[loop_id]
+        if stale:
+            logger.debug(f"Dropped {len(stale)} HTTP client(s) bound to closed event loops")
 
     async def close(self) -> None:
-        """Close global HTTP client."""
-        async with self._lock:
-            if self._client and not self._client.is_closed:
-                await self._client.aclose()
-                logger.debug("Closed global HTTP client")
+        """Close HTTP client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(id(loop))
+            if entry is not None and entry[0] is loop:
+                del self._clients[id(loop)]
+            else:
+                entry = None
+            self._prune_closed_loops()
+        if entry and not entry[1].is_closed:
+            await entry[1].aclose()
+            logger.debug("Closed global HTTP client")
 
 
 global_http_client_manager = GlobalHTTPClientManager()
 
 
+# Payload key paths checked in order by KiroHttpClient._extract_model_from_payload
+_MODEL_PATHS = (
+    ("modelId",),
+    ("model",),
+    ("conversationState", "currentMessage", "userInputMessage", "modelId"),
+    ("conversationState", "currentMessage", "userInputMessage", "model"),
+)
+
+
+def _get_path(data: dict, path: tuple) -> Any:
+    """Walk nested dicts along path, returning None if any level is missing."""
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+async def _discard_response(response: httpx.Response) -> None:
+    """
+    Release a 429/5xx response that is going to be retried after a backoff.
+
+    Error bodies are small; reading them before closing lets the pool keep
+    the connection alive, whereas closing an unread HTTP/1.1 response drops
+    the socket and the next attempt pays a new TLS handshake.
+    """
+    try:
+        await response.aread()
+    except httpx.HTTPError:
+        pass
+    finally:
+        await response.aclose()
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """
+    Compute jittered exponential backoff delay.
+
+    Random jitter spreads concurrent retries so they don't hit the upstream
+    in lockstep. A Retry-After header (seconds) is honored when present,
+    but the result never exceeds MAX_RETRY_DELAY.
+
+    Args:
+        attempt: Zero-based attempt number
+        response: Upstream response (for Retry-After)
+
+    Returns:
+        Delay in seconds
+    """
+    base = settings.base_retry_delay
+    delay = min(settings.max_retry_delay, random.uniform(base, base * 3 * (2 ** attempt)))
+
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                retry_after_seconds = float(retry_after)
+            except ValueError:
+                retry_after_seconds = None
+            # Ignore inf/nan and negative values rather than sleeping on them
+            if retry_after_seconds is not None and math.isfinite(retry_after_seconds) and retry_after_seconds >= 0:
+                delay = min(settings.max_retry_delay, max(delay, retry_after_seconds))
+
+    return delay
+
+
 class KiroHttpClient:
     """
     Kiro API HTTP client with retry logic.
@@ -73,37 +196,48 @@ class KiroHttpClient:
     - Timeout: Exponential backoff retry
     """
 
-    def __init__(self, auth_manager: KiroAuthManager):
-        """Initialize HTTP client."""
+    def __init__(self, auth_manager: KiroAuthManager, client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize HTTP client.
+
+        Args:
+            auth_manager: Authentication manager
+            client: Shared httpx client (app.state.http_client); falls back to global pool
+        """
         self.auth_manager = auth_manager
         self.client = None
+        self._shared_client = client
+        self._headers_cache: Optional[tuple] = None
 
     def _extract_model_from_payload(self, json_data: Optional[dict]) -> str:
         """Extract model name from common payload locations."""
         if not json_data:
             return ""
-        model = json_data.get("modelId") or json_data.get("model")
-        if model:
-            return model
-        conversation = json_data.get("conversationState") or {}
-        current = conversation.get("currentMessage") or {}
-        user_input = current.get("userInputMessage") or {}
-        model = user_input.get("modelId") or user_input.get("model")
-        if model:
-            return model
-        history = conversation.get("history") or []
+        for path in _MODEL_PATHS:
+            model = _get_path(json_data, path)
+            if model:
+                return model
+        history = (json_data.get("conversationState") or {}).get("history") or []
         for entry in reversed(history):
-            user_input = entry.get("userInputMessage") if isinstance(entry, dict) else None
-            if user_input and user_input.get("modelId"):
-                return user_input.get("modelId")
+            if isinstance(entry, dict):
+                model = (entry.get("userInputMessage") or {}).get("modelId")
+                if model:
+                    return model
         return ""
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get HTTP client (uses global connection pool)."""
+        """Get HTTP client (injected client or global connection pool)."""
+        client = self._shared_client
+        if client is not None and not client.is_closed:
+            return client
         return await global_http_client_manager.get_client()
 
     async def close(self) -> None:
-        """Close client (does not actually close global client)."""
+        """
+        No-op: the connection pool is shared and closed on app shutdown.
+
+        Instances may themselves be reused across requests (app.state.kiro_client).
+        """
         pass
 
     async def request_with_retry(
@@ -147,6 +281,9 @@ class KiroHttpClient:
         client = await self._get_client()
         last_error = None
 
+        # Serialize once, reused across retries
+        body = fast_json.dumps_bytes(json_data)
+
         for attempt in range(max_retries):
             try:
                 token = await self.auth_manager.get_access_token()
@@ -155,15 +292,17 @@ class KiroHttpClient:
                 request_timeout = httpx.Timeout(timeout)
 
                 if stream:
-                    # Prevent CLOSE_WAIT connection leak (issue #38)
-                    headers["Connection"] = "close"
+                    # Prevent CLOSE_WAIT connection leak (issue #38).
+                    # Connection-specific headers are not allowed in HTTP/2.
+                    if not USE_HTTP2:
+                        headers["Connection"] = "close"
                     req = client.build_request(
-                        method, url, json=json_data, headers=headers, timeout=request_timeout
+                        method, url, content=body, headers=headers, timeout=request_timeout
                     )
                     response = await client.send(req, stream=True)
                 else:
                     response = await client.request(
-                        method, url, json=json_data, headers=headers, timeout=request_timeout
+                        method, url, content=body, headers=headers, timeout=request_timeout
                     )
 
                 if response.status_code == 200:
@@ -171,21 +310,22 @@ class KiroHttpClient:
 
                 if response.status_code == 403:
                     logger.warning(f"Received 403, refreshing token (attempt {attempt + 1}/{max_retries})")
+                    # Closed unread: the retry waits on a token refresh anyway
                     await response.aclose()
                     await self.auth_manager.force_refresh()
                     continue
 
                 if response.status_code == 429:
-                    delay = settings.base_retry_delay * (2 ** attempt)
-                    logger.warning(f"Received 429, waiting {delay}s (attempt {attempt + 1}/{max_retries})")
-                    await response.aclose()
+                    delay = _retry_delay(attempt, response)
+                    logger.warning(f"Received 429, waiting {delay:.2f}s (attempt {attempt + 1}/{max_retries})")
+                    await _discard_response(response)
                     await asyncio.sleep(delay)
                     continue
 
                 if 500 <= response.status_code < 600:
-                    delay = settings.base_retry_delay * (2 ** attempt)
-                    logger.warning(f"Received {response.status_code}, waiting {delay}s (attempt {attempt + 1}/{max_retries})")
-                    await response.aclose()
+                    delay = _retry_delay(attempt, response)
+                    logger.warning(f"Received {response.status_code}, waiting {delay:.2f}s (attempt {attempt + 1}/{max_retries})")
+                    await _discard_response(response)
                     await asyncio.sleep(delay)
                     continue
 
@@ -196,14 +336,14 @@ class KiroHttpClient:
                 if stream:
                     logger.warning(f"First token timeout after {timeout}s for model {model} (attempt {attempt + 1}/{max_retries})")
                 else:
-                    delay = settings.base_retry_delay * (2 ** attempt)
-                    logger.warning(f"Timeout after {timeout}s for model {model}, waiting {delay}s (attempt {attempt + 1}/{max_retries})")
+                    delay = _retry_delay(attempt)
+                    logger.warning(f"Timeout after {timeout}s for model {model}, waiting {delay:.2f}s (attempt {attempt + 1}/{max_retries})")
                     await asyncio.sleep(delay)
 
             except httpx.RequestError as e:
                 last_error = e
-                delay = settings.base_retry_delay * (2 ** attempt)
-                logger.warning(f"Request error: {e}, waiting {delay}s (attempt {attempt + 1}/{max_retries})")
+                delay = _retry_delay(attempt)
+                logger.warning(f"Request error: {e}, waiting {delay:.2f}s (attempt {attempt + 1}/{max_retries})")
                 await asyncio.sleep(delay)
 
         if stream:
@@ -218,8 +358,21 @@ class KiroHttpClient:
             )
 
     def _get_headers(self, token: str) -> dict:
-        """Build request headers."""
-        return get_kiro_headers(self.auth_manager, token)
+        """
+        Build request headers.
+
+        Headers are cached per token; each call returns a copy with a fresh
+        invocation id, since callers may modify it and the id is per request.
+        """
+        cached = self._headers_cache
+        if cached is None or cached[0] != token:
+            cached = (token, get_kiro_headers(self.auth_manager, token))
+            self._headers_cache = cached
+            return cached[1].copy()
+
+        headers = cached[1].copy()
+        headers["amz-sdk-invocation-id"] = str(uuid.uuid4())
+        return headers
 
     async def __aenter__(self) -> "KiroHttpClient":
         """Support async context manager."""
@@ -231,5 +384,6 @@ class KiroHttpClient:
 
 
 async def close_global_http_client():
-    """Close global HTTP client (called on app shutdown)."""
+    """Close global HTTP clients (called on app shutdown)."""
     await global_http_client_manager.close()
+    await close_refresh_http_client()
@@ -11,55 +11,20 @@ Contains classes and functions for:
 
 import json
 import re
-from typing import Any, Dict, List, Optional
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional
 
 from loguru import logger
 
+from app.core.config import settings
+from app.utils import fast_json
 from app.utils.helpers import generate_tool_call_id
 
+_BRACKET_CALL_RE: re.Pattern = re.compile(r'\[Called\s+(\w+)\s+with\s+args:\s*', re.IGNORECASE)
 
-def find_matching_brace(text: str, start_pos: int) -> int:
-    """
-    Find position of closing brace considering nesting and strings.
-
-    Args:
-        text: Text to search
-        start_pos: Position of opening brace '{'
-
-    Returns:
-        Position of closing brace or -1 if not found
-    """
-    if start_pos >= len(text) or text[start_pos] != '{':
-        return -1
-
-    brace_count = 0
-    in_string = False
-    escape_next = False
+_JSON_DECODER = json.JSONDecoder()
 
-    for i in range(start_pos, len(text)):
-        char = text[i]
-
-        if escape_next:
-            escape_next = False
-            continue
-
-        if char == '\\' and in_string:
-            escape_next = True
-            continue
-
-        if char == '"' and not escape_next:
-            in_string = not in_string
-            continue
-
-        if not in_string:
-            if char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    return i
-
-    return -1
+_EMPTY_ARGS = "{}"
 
 
 def parse_bracket_tool_calls(response_text: str) -> List[Dict[str, Any]]:
@@ -79,9 +44,8 @@ def parse_bracket_tool_calls(response_text: str) -> List[Dict[str, Any]]:
         return []
 
     tool_calls = []
-    pattern = r'\[Called\s+(\w+)\s+with\s+args:\s*'
 
-    for match in re.finditer(pattern, response_text, re.IGNORECASE):
+    for match in _BRACKET_CALL_RE.finditer(response_text):
         func_name = match.group(1)
         args_start = match.end()
 
@@ -89,25 +53,22 @@ def parse_bracket_tool_calls(response_text: str) -> List[Dict[str, Any]]:
         if json_start == -1:
             continue
 
-        json_end = find_matching_brace(response_text, json_start)
-        if json_end == -1:
+        # raw_decode finds the end of the JSON object itself (in C)
+        try:
+            args, _ = _JSON_DECODER.raw_decode(response_text, json_start)
+        except fast_json.JSONDecodeError:
+            logger.warning(f"Failed to parse tool call arguments: {response_text[json_start:json_start + 100]}")
             continue
 
-        json_str = response_text[json_start:json_end + 1]
-
-        try:
-            args = json.loads(json_str)
-            tool_call_id = generate_tool_call_id()
-            tool_calls.append({
-                "id": tool_call_id,
-                "type": "function",
-                "function": {
-                    "name": func_name,
-                    "arguments": json.dumps(args)
-                }
-            })
-        except json.JSONDecodeError:
-            logger.warning(f"Failed to parse tool call arguments: {json_str[:100]}")
+        tool_call_id = generate_tool_call_id()
+        tool_calls.append({
+            "id": tool_call_id,
+            "type": "function",
+            "function": {
+                "name": func_name,
+                "arguments": fast_json.dumps(args)
+            }
+        })
 
     return tool_calls
 
@@ -126,34 +87,36 @@ def deduplicate_tool_calls(tool_calls: List[Dict[str, Any]]) -> List[Dict[str, A
     Returns:
         List of unique tool calls
     """
-    by_id: Dict[str, Dict[str, Any]] = {}
+    # id -> index into with_id; replacements keep the first occurrence position
+    by_id: Dict[str, int] = {}
+    with_id: List[Dict[str, Any]] = []
+    without_id: List[Dict[str, Any]] = []
+
     for tc in tool_calls:
         tc_id = tc.get("id", "")
         if not tc_id:
+            without_id.append(tc)
             continue
 
-        existing = by_id.get(tc_id)
-        if existing is None:
-            by_id[tc_id] = tc
+        index = by_id.get(tc_id)
+        if index is None:
+            by_id[tc_id] = len(with_id)
+            with_id.append(tc)
         else:
-            existing_args = existing.get("function", {}).get("arguments", "{}")
-            current_args = tc.get("function", {}).get("arguments", "{}")
+            existing_args = with_id[index].get("function", {}).get("arguments", _EMPTY_ARGS)
+            current_args = tc.get("function", {}).get("arguments", _EMPTY_ARGS)
 
-            if current_args != "{}" and (existing_args == "{}" or len(current_args) > len(existing_args)):
+            if current_args != _EMPTY_ARGS and (existing_args == _EMPTY_ARGS or len(current_args) > len(existing_args)):
                 logger.debug(f"Replacing tool call {tc_id} with better arguments: {len(existing_args)} -> {len(current_args)}")
-                by_id[tc_id] = tc
-
-    result_with_id = list(by_id.values())
-    result_without_id = [tc for tc in tool_calls if not tc.get("id")]
+                with_id[index] = tc
 
     seen = set()
     unique = []
 
-    for tc in result_with_id + result_without_id:
+    for tc in chain(with_id, without_id):
         func = tc.get("function") or {}
-        func_name = func.get("name") or ""
-        func_args = func.get("arguments") or "{}"
-        key = f"{func_name}-{func_args}"
+        # NUL separator keeps name/arguments boundary unambiguous
+        key = (func.get("name") or "") + "\x00" + (func.get("arguments") or _EMPTY_ARGS)
         if key not in seen:
             seen.add(key)
             unique.append(tc)
@@ -179,95 +142,229 @@ class AwsEventStreamParser:
     - context_usage: Context usage percentage
     """
 
+    # First field name of event JSON -> event type
     _PATTERN_TYPE_MAP = {
-        '{"content":': 'content',
-        '{"name":': 'tool_start',
-        '{"input":': 'tool_input',
-        '{"stop":': 'tool_stop',
-        '{"followupPrompt":': 'followup',
-        '{"usage":': 'usage',
-        '{"contextUsagePercentage":': 'context_usage',
+        b'content': 'content',
+        b'name': 'tool_start',
+        b'input': 'tool_input',
+        b'stop': 'tool_stop',
+        b'followupPrompt': 'followup',
+        b'usage': 'usage',
+        b'contextUsagePercentage': 'context_usage',
     }
 
+    # One capture group per field name: match.lastindex selects the event type
+    # from _PATTERN_TYPES without slicing or hashing the matched prefix
     _PATTERN_REGEX = re.compile(
-        r'\{"(?:content|name|input|stop|followupPrompt|usage|contextUsagePercentage)":'
+        rb'\{"(?:' + b'|'.join(b'(' + re.escape(name) + b')' for name in _PATTERN_TYPE_MAP) + rb')":'
     )
+    _PATTERN_TYPES = (None,) + tuple(_PATTERN_TYPE_MAP.values())
+
+    # Outside strings only braces and quotes change state; everything else is skipped in C
+    _STRUCTURAL_REGEX = re.compile(rb'[{}"]')
+
+    # Body of a JSON string up to (not including) its closing quote, escapes included.
+    # Stops early at a trailing backslash whose escaped byte has not arrived yet.
+    _STRING_BODY_REGEX = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+    # Longest event prefix minus one: a partial prefix may sit at the buffer tail
+    _MAX_PREFIX_TAIL = max(len(name) for name in _PATTERN_TYPE_MAP) + len(b'{"":') - 1
+
+    def __init__(self, max_buffer_bytes: int = None):
+        """
+        Initialize parser.
 
-    def __init__(self):
-        """Initialize parser."""
-        self.buffer = ""
+        Args:
+            max_buffer_bytes: Max size of unparsed buffer before the pending event is dropped
+        """
+        self.buffer = bytearray()
+        self._max_buffer_bytes = max_buffer_bytes or settings.parser_max_buffer_bytes
         self.last_content: Optional[str] = None
         self.current_tool_call: Optional[Dict[str, Any]] = None
         self.tool_calls: List[Dict[str, Any]] = []
-
-    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        # Closed tool calls with their bracket counts, finalized in get_tool_calls
+        self._pending_tool_calls: List[tuple] = []
+        # Running brace/bracket counts of current tool call arguments
+        self._args_braces = (0, 0)
+        self._args_brackets = (0, 0)
+        self._reset_scan_state()
+
+    def _set_tool_arguments(self, input_str: str, append: bool = False) -> None:
+        """Set (or append to) current tool call arguments, updating bracket counts."""
+        function = self.current_tool_call["function"]
+        if append:
+            function["arguments"] += input_str
+            open_braces, close_braces = self._args_braces
+            open_brackets, close_brackets = self._args_brackets
+        else:
+            function["arguments"] = input_str
+            open_braces = close_braces = open_brackets = close_brackets = 0
+        if input_str:
+            open_braces += input_str.count('{')
+            close_braces += input_str.count('}')
+            open_brackets += input_str.count('[')
+            close_brackets += input_str.count(']')
+        self._args_braces = (open_braces, close_braces)
+        self._args_brackets = (open_brackets, close_brackets)
+
+    def _reset_scan_state(self) -> None:
+        """Reset incremental scanner state (position inside current event)."""
+        self._scan_pos = 0
+        self._event_start = -1
+        self._event_type: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
         """
         Add chunk to buffer and return parsed events.
 
+        Bytes are scanned incrementally: brace depth and string state are
+        kept between calls, so each byte of a partially received event is
+        inspected only once.
+
+        The chunk is buffered immediately; events are produced lazily, so the
+        caller can forward the first event before the rest are parsed.
+
         Args:
             chunk: Bytes data from stream
 
         Returns:
-            List of events in format {"type": str, "data": Any}
+            Iterator of events in format {"type": str, "data": Any}
         """
-        try:
-            self.buffer += chunk.decode('utf-8', errors='ignore')
-        except Exception:
-            return []
+        if not chunk:
+            return iter(())
+
+        # In-place extend: bytearray over-allocates geometrically and deleting
+        # consumed bytes from the front only moves its start offset
+        self.buffer.extend(chunk)
+        return self._drain()
 
-        events = []
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        """Yield complete events from buffer, then drop consumed bytes."""
+        buf = self.buffer
 
         while True:
-            match = self._PATTERN_REGEX.search(self.buffer)
-            if not match:
+            if self._event_type is None:
+                match = self._PATTERN_REGEX.search(buf, self._scan_pos)
+                if not match:
+                    # A prefix split across chunks must start at a '{' in the tail
+                    # window; without one, everything scanned so far can be dropped
+                    tail_start = max(self._scan_pos, len(buf) - self._MAX_PREFIX_TAIL)
+                    brace = buf.find(b'{', tail_start)
+                    self._scan_pos = brace if brace != -1 else len(buf)
+                    break
+                self._event_start = match.start()
+                self._event_type = self._PATTERN_TYPES[match.lastindex]
+                self._scan_pos = self._event_start
+
+            json_end = self._scan_event(buf)
+            if json_end == -1:
                 break
 
-            earliest_pos = match.start()
-            colon_pos = self.buffer.find(':', earliest_pos)
-            if colon_pos == -1:
-                break
-            pattern_prefix = self.buffer[earliest_pos:colon_pos + 1]
-            earliest_type = self._PATTERN_TYPE_MAP.get(pattern_prefix)
+            raw = bytes(buf[self._event_start:json_end + 1])
+            event_type = self._event_type
+            self._reset_scan_state()
+            self._scan_pos = json_end + 1
 
-            if earliest_type is None:
-                self.buffer = self.buffer[earliest_pos + 1:]
+            try:
+                data = fast_json.loads(raw)
+            except ValueError:
+                # Invalid UTF-8 inside the event: retry with bad bytes replaced (U+FFFD).
+                # Chunk boundaries never split characters here, since complete events
+                # are decoded from the bytes buffer, so this only hits truly bad bytes.
+                try:
+                    data = fast_json.loads(raw.decode('utf-8', errors='replace'))
+                except ValueError:
+                    continue
+
+            # Hot path: content events skip the generic dispatch
+            if event_type == 'content':
+                content = data.get('content', '')
+                if content and content != self.last_content and not data.get('followupPrompt'):
+                    self.last_content = content
+                    yield {"type": "content", "data": content}
                 continue
 
-            json_end = find_matching_brace(self.buffer, earliest_pos)
-            if json_end == -1:
-                break
+            event = self._process_event(event_type, data)
+            if event:
+                yield event
+
+        # Drop consumed bytes, keeping the current event (or a possible partial prefix)
+        cut = self._event_start if self._event_type is not None else self._scan_pos
+        if cut > 0:
+            del buf[:cut]
+            self._scan_pos -= cut
+            if self._event_type is not None:
+                self._event_start = 0
+
+        # Bound memory: an event this large is never completed by a sane stream
+        if len(buf) > self._max_buffer_bytes:
+            logger.warning(
+                f"Stream parser buffer exceeded {self._max_buffer_bytes} bytes "
+                f"waiting for '{self._event_type}' event end, dropping it"
+            )
+            buf.clear()
+            self._reset_scan_state()
+
+    def _scan_event(self, buf: bytearray) -> int:
+        """
+        Continue scanning current event for its closing brace.
 
-            json_str = self.buffer[earliest_pos:json_end + 1]
-            self.buffer = self.buffer[json_end + 1:]
+        Args:
+            buf: Stream buffer
 
-            try:
-                data = json.loads(json_str)
-            except json.JSONDecodeError:
+        Returns:
+            Position of closing brace or -1 if event is still incomplete
+        """
+        pos = self._scan_pos
+        depth = self._depth
+        in_string = self._in_string
+        search = self._STRUCTURAL_REGEX.search
+        string_body = self._STRING_BODY_REGEX.match
+        end = len(buf)
+
+        while True:
+            if in_string:
+                # Consume the whole string body with one C-level match
+                pos = string_body(buf, pos).end()
+                if pos >= end or buf[pos] != 0x22:
+                    break
+                in_string = False
+                pos += 1
                 continue
 
-            event = self._process_event(earliest_type, data)
-            if event:
-                events.append(event)
+            match = search(buf, pos)
+            if match is None:
+                pos = end
+                break
+            i = match.start()
+            char = buf[i]
+
+            if char == 0x22:  # quote
+                in_string = True
+            elif char == 0x7B:  # {
+                depth += 1
+            else:  # }
+                depth -= 1
+                if depth == 0:
+                    return i
+            pos = i + 1
 
-        return events
+        self._scan_pos = pos
+        self._depth = depth
+        self._in_string = in_string
+        return -1
 
     def _process_event(self, event_type: str, data: dict) -> Optional[Dict[str, Any]]:
-        """Process single event based on type."""
-        if event_type == 'content':
-            content = data.get('content', '')
-            if data.get('followupPrompt'):
-                return None
-            if content and content != self.last_content:
-                self.last_content = content
-                return {"type": "content", "data": content}
-
-        elif event_type == 'tool_start':
+        """Process single non-content event based on type."""
+        if event_type == 'tool_start':
             if self.current_tool_call:
-                self._finalize_tool_call()
+                self._close_tool_call()
 
             input_data = data.get('input', '')
             if isinstance(input_data, dict):
-                input_str = json.dumps(input_data)
+                input_str = fast_json.dumps(input_data)
             else:
                 input_str = str(input_data) if input_data else ''
 
@@ -279,35 +376,38 @@ class AwsEventStreamParser:
                 "type": "function",
                 "function": {
                     "name": tool_name,
-                    "arguments": input_str
+                    "arguments": ""
                 }
             }
+            self._set_tool_arguments(input_str)
 
             if data.get('stop'):
-                self._finalize_tool_call()
+                self._close_tool_call()
 
         elif event_type == 'tool_input':
             if self.current_tool_call:
                 input_data = data.get('input', '')
                 if isinstance(input_data, dict):
-                    input_str = json.dumps(input_data)
+                    input_str = fast_json.dumps(input_data)
                 else:
                     input_str = str(input_data) if input_data else ''
 
+                # Only arguments ending with '}' can already be a complete JSON object,
+                # which avoids re-parsing the growing arguments on every fragment
                 current_args = self.current_tool_call['function']['arguments']
-                if current_args.strip():
+                if current_args[-64:].rstrip().endswith('}'):
                     try:
-                        json.loads(current_args)
+                        fast_json.loads(current_args)
                         logger.warning(f"[TOOL_INPUT] IGNORING extra input after valid JSON")
                         return None
-                    except json.JSONDecodeError:
+                    except fast_json.JSONDecodeError:
                         pass
 
-                self.current_tool_call["function"]["arguments"] += input_str
+                self._set_tool_arguments(input_str, append=True)
 
         elif event_type == 'tool_stop':
             if self.current_tool_call and data.get('stop'):
-                self._finalize_tool_call()
+                self._close_tool_call()
 
         elif event_type == 'usage':
             return {"type": "usage", "data": data.get('usage')}
@@ -317,6 +417,18 @@ class AwsEventStreamParser:
 
         return None
 
+    def _close_tool_call(self) -> None:
+        """
+        Close current tool call while streaming.
+
+        Argument parsing/repair is deferred to get_tool_calls (end of stream),
+        keeping JSON work off the path that emits content events.
+        """
+        self._pending_tool_calls.append((self.current_tool_call, self._args_braces, self._args_brackets))
+        self.current_tool_call = None
+        self._args_braces = (0, 0)
+        self._args_brackets = (0, 0)
+
     def _finalize_tool_call(self) -> None:
         """Finalize current tool call and add to list."""
         if not self.current_tool_call:
@@ -330,10 +442,10 @@ class AwsEventStreamParser:
         if isinstance(args, str):
             if args.strip():
                 try:
-                    parsed = json.loads(args)
-                    self.current_tool_call['function']['arguments'] = json.dumps(parsed)
+                    # Valid JSON is kept as received, no re-serialize round trip
+                    parsed = fast_json.loads(args)
                     logger.debug(f"Tool '{tool_name}' arguments parsed successfully: {list(parsed.keys()) if isinstance(parsed, dict) else type(parsed)}")
-                except json.JSONDecodeError as e:
+                except fast_json.JSONDecodeError as e:
                     # Analyze the failure to provide better diagnostics
                     truncation_info = self._diagnose_json_truncation(args)
                     
@@ -349,10 +461,8 @@ class AwsEventStreamParser:
                         
                         # Try to auto-complete truncated JSON
                         fixed_args = args.strip()
-                        open_braces = fixed_args.count('{')
-                        close_braces = fixed_args.count('}')
-                        open_brackets = fixed_args.count('[')
-                        close_brackets = fixed_args.count(']')
+                        open_braces, close_braces = self._args_braces
+                        open_brackets, close_brackets = self._args_brackets
                         
                         # Add missing closing brackets first, then braces
                         if open_brackets > close_brackets:
@@ -363,31 +473,33 @@ class AwsEventStreamParser:
                         if fixed_args != args.strip():
                             logger.info(f"Attempting auto-complete for truncated '{tool_name}'")
                             try:
-                                parsed = json.loads(fixed_args)
-                                self.current_tool_call['function']['arguments'] = json.dumps(parsed)
+                                parsed = fast_json.loads(fixed_args)
+                                self.current_tool_call['function']['arguments'] = fast_json.dumps(parsed)
                                 logger.info(f"Successfully auto-completed truncated JSON for '{tool_name}'")
-                            except json.JSONDecodeError:
+                            except fast_json.JSONDecodeError:
                                 logger.warning(f"Auto-complete failed for truncated '{tool_name}'")
-                                self.current_tool_call['function']['arguments'] = "{}"
+                                self.current_tool_call['function']['arguments'] = _EMPTY_ARGS
                         else:
-                            self.current_tool_call['function']['arguments'] = "{}"
+                            self.current_tool_call['function']['arguments'] = _EMPTY_ARGS
                     else:
                         # Regular JSON parse error (malformed, not truncated)
                         logger.warning(f"Failed to parse tool '{tool_name}' arguments: {e}. Raw: {args[:200]}")
-                        self.current_tool_call['function']['arguments'] = "{}"
+                        self.current_tool_call['function']['arguments'] = _EMPTY_ARGS
             else:
                 # Empty string - use empty object
                 logger.debug(f"Tool '{tool_name}' has empty arguments string (will be deduplicated)")
-                self.current_tool_call['function']['arguments'] = "{}"
+                self.current_tool_call['function']['arguments'] = _EMPTY_ARGS
         elif isinstance(args, dict):
-            self.current_tool_call['function']['arguments'] = json.dumps(args)
+            self.current_tool_call['function']['arguments'] = fast_json.dumps(args)
             logger.debug(f"Tool '{tool_name}' arguments already dict with keys: {list(args.keys())}")
         else:
             logger.warning(f"Tool '{tool_name}' has unexpected arguments type: {type(args)}")
-            self.current_tool_call['function']['arguments'] = "{}"
+            self.current_tool_call['function']['arguments'] = _EMPTY_ARGS
 
         self.tool_calls.append(self.current_tool_call)
         self.current_tool_call = None
+        self._args_braces = (0, 0)
+        self._args_brackets = (0, 0)
 
     def _diagnose_json_truncation(self, json_str: str) -> Dict[str, Any]:
         """
@@ -474,14 +586,24 @@ class AwsEventStreamParser:
         return {"is_truncated": False, "reason": "malformed JSON", "size_bytes": size_bytes}
 
     def get_tool_calls(self) -> List[Dict[str, Any]]:
-        """Return collected tool calls, finalizing any pending one."""
+        """Return collected tool calls, finalizing pending ones."""
         if self.current_tool_call:
+            self._close_tool_call()
+        for tool_call, braces, brackets in self._pending_tool_calls:
+            self.current_tool_call = tool_call
+            self._args_braces = braces
+            self._args_brackets = brackets
             self._finalize_tool_call()
+        self._pending_tool_calls = []
         return deduplicate_tool_calls(self.tool_calls)
 
     def reset(self) -> None:
         """Reset parser state."""
-        self.buffer = ""
+        self.buffer.clear()
         self.last_content = None
         self.current_tool_call = None
         self.tool_calls = []
+        self._pending_tool_calls = []
+        self._args_braces = (0, 0)
+        self._args_brackets = (0, 0)
+        self._reset_scan_state()
@@ -11,16 +11,18 @@ Contains generators for:
 """
 
 import asyncio
-import json
+import re
+import sys
 import time
-from typing import TYPE_CHECKING, AsyncGenerator, Optional, Dict, Any, List
+from typing import TYPE_CHECKING, AsyncGenerator, Awaitable, Optional, Dict, Any, List, Tuple
 
 import httpx
 from loguru import logger
 
 from app.libs.parsers import AwsEventStreamParser, parse_bracket_tool_calls, deduplicate_tool_calls
 from app.libs.thinking_parser import ThinkingParser
-from app.libs.tokenizer import count_tokens, count_message_tokens, count_tools_tokens
+from app.libs.tokenizer import IncrementalCounter, count_message_tokens, count_tools_tokens
+from app.utils import fast_json
 from app.utils.helpers import generate_completion_id
 from app.core.config import (
     settings,
@@ -34,6 +36,15 @@ if TYPE_CHECKING:
     from app.libs.cache import ModelInfoCache
 
 
+SSE_DONE: bytes = b"data: [DONE]\n\n"
+
+# Chunks read ahead of the parser before the reader waits for it
+_READ_AHEAD_CHUNKS = 8
+
+# Closes the delta object and the chunk opened by _chunk_prefix()
+_CHUNK_SUFFIX: bytes = b',"finish_reason":null}]}\n\n'
+
+
 class FirstTokenTimeoutError(Exception):
     """Exception raised when first token timeout occurs."""
     pass
@@ -44,29 +55,178 @@ class StreamReadTimeoutError(Exception):
     pass
 
 
-async def _read_chunk_with_timeout(byte_iterator, timeout: float) -> bytes:
-    """Read a chunk from byte iterator with timeout."""
+if sys.version_info >= (3, 11):
+    async def _await_with_timeout(awaitable: Awaitable[Any], timeout: float) -> Any:
+        """
+        Await under a timer handle instead of a wrapper task.
+
+        Raises:
+            asyncio.TimeoutError: If awaitable does not complete within timeout
+        """
+        async with asyncio.timeout(timeout):
+            return await awaitable
+else:
+    async def _await_with_timeout(awaitable: Awaitable[Any], timeout: float) -> Any:
+        """Await with timeout (pre-3.11 fallback)."""
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+
+
+async def _pump_chunks(byte_iterator, queue: asyncio.Queue) -> None:
+    """
+    Read response chunks into queue so network reads overlap with parsing.
+
+    Puts None at end of stream, or the exception that stopped reading.
+    Read timeouts are enforced by the consumer on queue.get(), so a slow
+    chunk never cancels (and thereby closes) the byte iterator.
+    """
     try:
-        return await asyncio.wait_for(
-            byte_iterator.__anext__(),
-            timeout=timeout
+        async for chunk in byte_iterator:
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(e)
+    else:
+        await queue.put(None)
+
+
+class _DeltaCoalescer:
+    """
+    Merges back-to-back content deltas into fewer SSE frames.
+
+    Text of the same kind ("content" or "reasoning_content") is held until the
+    coalescing window since its first fragment expires, the held text reaches
+    max_chars, or a fragment of the other kind arrives. A zero window emits
+    every fragment immediately.
+    """
+
+    def __init__(self, chunk_prefix: bytes, window: float, max_chars: int):
+        self._chunk_prefix = chunk_prefix
+        self._window = window
+        self._max_chars = max_chars
+        self._kind: Optional[str] = None
+        self._parts: List[str] = []
+        self._size = 0
+        self._role_sent = False
+        self.deadline = 0.0
+
+    @property
+    def pending(self) -> bool:
+        """Whether there is held text waiting to be flushed."""
+        return bool(self._parts)
+
+    def add(self, kind: str, text: str, now: float) -> bytes:
+        """
+        Hold a delta fragment.
+
+        Args:
+            kind: Delta field name
+            text: Fragment text
+            now: Current loop time
+
+        Returns:
+            SSE frames that became due (possibly empty)
+        """
+        frames = b""
+        if self._parts and kind != self._kind:
+            frames = self.flush()
+        if not self._parts:
+            self._kind = kind
+            self.deadline = now + self._window
+
+        self._parts.append(text)
+        self._size += len(text)
+
+        if self._size >= self._max_chars or now >= self.deadline:
+            frames += self.flush()
+        return frames
+
+    def flush(self) -> bytes:
+        """Encode held text as one SSE frame (empty bytes if nothing is held)."""
+        if not self._parts:
+            return b""
+
+        text = self._parts[0] if len(self._parts) == 1 else "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+
+        delta = {self._kind: text}
+        if not self._role_sent:
+            delta["role"] = "assistant"
+            self._role_sent = True
+
+        return _delta_frame(self._chunk_prefix, delta)
+
+
+def _thinking_deltas(thinking_parser: ThinkingParser, result) -> List[Tuple[str, str]]:
+    """
+    Turn a ThinkingParser result into (delta_kind, text) pairs in output order.
+
+    Args:
+        thinking_parser: Parser that produced the result
+        result: ThinkingParseResult from feed() or finalize()
+    """
+    deltas = []
+    if result.thinking_content:
+        processed_thinking = thinking_parser.process_for_output(
+            result.thinking_content,
+            result.is_first_thinking_chunk,
+            result.is_last_thinking_chunk,
         )
-    except asyncio.TimeoutError:
-        raise StreamReadTimeoutError(f"Stream read timeout after {timeout}s")
+        if processed_thinking:
+            if FAKE_REASONING_HANDLING == "as_reasoning_content":
+                deltas.append(("reasoning_content", processed_thinking))
+            else:
+                deltas.append(("content", processed_thinking))
+
+    if result.regular_content:
+        deltas.append(("content", result.regular_content))
+    return deltas
+
+
+def _chunk_prefix(completion_id: str, created_time: int, model: str) -> bytes:
+    """
+    Pre-encode the part of a chat.completion.chunk frame that is fixed for a request.
+
+    A frame for a delta is then built by _delta_frame(), so only the delta
+    is serialized per event.
+    """
+    return (
+        b'data: {"id":' + fast_json.dumps_bytes(completion_id)
+        + b',"object":"chat.completion.chunk","created":' + str(created_time).encode("ascii")
+        + b',"model":' + fast_json.dumps_bytes(model)
+        + b',"choices":[{"index":0,"delta":'
+    )
+
+
+def _delta_frame(chunk_prefix: bytes, delta: Dict[str, Any]) -> bytes:
+    """Encode a delta chunk on top of the request prefix (one allocation for the frame)."""
+    return b"".join((chunk_prefix, fast_json.dumps_bytes(delta), _CHUNK_SUFFIX))
+
+
+def _final_chunk_frame(chunk_prefix: bytes, finish_reason: str, usage: Optional[Dict[str, Any]]) -> bytes:
+    """
+    Encode the closing chunk (empty delta, finish_reason and usage) on top of the request prefix.
+
+    Args:
+        chunk_prefix: Prefix from _chunk_prefix()
+        finish_reason: OpenAI finish reason
+        usage: Usage object, or None to omit it
+    """
+    parts = [chunk_prefix, b'{},"finish_reason":', fast_json.dumps_bytes(finish_reason), b'}]']
+    if usage is not None:
+        parts += (b',"usage":', fast_json.dumps_bytes(usage))
+    parts.append(b'}\n\n')
+    return b"".join(parts)
 
 
 def _calculate_usage_tokens(
-    full_content: str,
-    full_reasoning_content: str,
+    completion_tokens: int,
     context_usage_percentage: Optional[float],
     model_cache: "ModelInfoCache",
     model: str,
     request_messages: Optional[list],
     request_tools: Optional[list]
 ) -> Dict[str, Any]:
-    """Calculate token usage from response."""
-    completion_tokens = count_tokens(full_content + (full_reasoning_content or ""))
-
+    """Calculate token usage from response, given its already counted completion tokens."""
     total_tokens_from_api = 0
     if context_usage_percentage is not None and context_usage_percentage > 0:
         max_input_tokens = model_cache.get_max_input_tokens(model)
@@ -96,10 +256,18 @@ def _calculate_usage_tokens(
     }
 
 
-def _format_tool_calls_for_streaming(tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Format tool calls for streaming response with required index field."""
-    indexed_tool_calls = []
-    valid_idx = 0
+def _format_tool_calls(tool_calls: List[Dict[str, Any]], indexed: bool) -> List[Dict[str, Any]]:
+    """
+    Format tool calls for the response, dropping calls without a name.
+
+    Args:
+        tool_calls: Deduplicated tool calls
+        indexed: Add the "index" field required in streaming deltas
+
+    Returns:
+        Tool calls in OpenAI response format
+    """
+    formatted = []
     for idx, tc in enumerate(tool_calls):
         func = tc.get("function") or {}
         tool_name = func.get("name") or ""
@@ -112,49 +280,77 @@ def _format_tool_calls_for_streaming(tool_calls: List[Dict[str, Any]]) -> List[D
             logger.warning(f"Dropping tool call with no name at index {idx}")
             continue
 
-        logger.debug(f"Tool call [{valid_idx}] '{tool_name}': id={tc.get('id')}, args_length={len(tool_args)}")
-
-        indexed_tc = {
-            "index": valid_idx,
-            "id": tc.get("id"),
-            "type": tc.get("type", "function"),
-            "function": {
-                "name": tool_name,
-                "arguments": tool_args
-            }
-        }
-        indexed_tool_calls.append(indexed_tc)
-        valid_idx += 1
+        formatted_tc = {"index": len(formatted)} if indexed else {}
+        formatted_tc["id"] = tc.get("id")
+        formatted_tc["type"] = tc.get("type", "function")
+        formatted_tc["function"] = {"name": tool_name, "arguments": tool_args}
 
-    return indexed_tool_calls
+        if indexed:
+            logger.debug(f"Tool call [{len(formatted)}] '{tool_name}': id={tc.get('id')}, args_length={len(tool_args)}")
+        formatted.append(formatted_tc)
 
+    return formatted
 
-def _format_tool_calls_for_non_streaming(tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Format tool calls for non-streaming response (without index field)."""
-    cleaned_tool_calls = []
-    for tc in tool_calls:
-        func = tc.get("function") or {}
-        tool_name = func.get("name", "")
-        tool_args = func.get("arguments", "{}")
 
-        if tool_args == "{}" or tool_args.strip() == "":
-            logger.warning(f"Tool call '{tool_name}' has empty arguments")
+class StreamingCompletionAccumulator:
+    """
+    Single pass over completion text as it is emitted.
+
+    Counts tokens incrementally and keeps only the text from the first
+    possible bracket tool call ("[Called ...") onwards, so the full
+    completion never has to be joined just to count and scan it. Text
+    before that marker cannot contain a bracket tool call, so
+    finalize() returns the same calls as parse_bracket_tool_calls on the
+    whole text.
+    """
 
-        if not tool_name:
-            logger.warning(f"Dropping tool call with no name")
-            continue
+    _MARKER_RE: re.Pattern = re.compile(r'\[Called', re.IGNORECASE)
+    _MARKER_TAIL = len("[Called") - 1
+
+    def __init__(self, count_tokens: bool = True):
+        """
+        Args:
+            count_tokens: Count completion tokens (finalize() reports 0 when disabled)
+        """
+        self._counter: Optional[IncrementalCounter] = IncrementalCounter() if count_tokens else None
+        self._tail = ""
+        self._capture: Optional[bytearray] = None
+
+    def feed(self, text: str, scan_tool_calls: bool = True) -> None:
+        """
+        Account for an emitted fragment.
+
+        Args:
+            text: Fragment text
+            scan_tool_calls: Whether the fragment is content that may carry bracket tool calls
+        """
+        if self._counter is not None:
+            self._counter.feed(text)
+        if not scan_tool_calls or not text:
+            return
 
-        cleaned_tc = {
-            "id": tc.get("id"),
-            "type": tc.get("type", "function"),
-            "function": {
-                "name": tool_name,
-                "arguments": tool_args
-            }
-        }
-        cleaned_tool_calls.append(cleaned_tc)
+        if self._capture is not None:
+            self._capture += text.encode("utf-8", "surrogatepass")
+            return
 
-    return cleaned_tool_calls
+        combined = self._tail + text
+        match = self._MARKER_RE.search(combined)
+        if match:
+            self._capture = bytearray(combined[match.start():].encode("utf-8", "surrogatepass"))
+            self._tail = ""
+        else:
+            self._tail = combined[-self._MARKER_TAIL:]
+
+    def finalize(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Returns:
+            Tuple of (completion_tokens with Claude correction, bracket tool calls)
+        """
+        bracket_tool_calls = []
+        if self._capture is not None:
+            bracket_tool_calls = parse_bracket_tool_calls(self._capture.decode("utf-8", "surrogatepass"))
+        completion_tokens = self._counter.result() if self._counter is not None else 0
+        return completion_tokens, bracket_tool_calls
 
 
 async def stream_kiro_to_openai(
@@ -164,8 +360,9 @@ async def stream_kiro_to_openai(
     model_cache: "ModelInfoCache",
     auth_manager: "KiroAuthManager",
     request_messages: Optional[list] = None,
-    request_tools: Optional[list] = None
-) -> AsyncGenerator[str, None]:
+    request_tools: Optional[list] = None,
+    include_usage: bool = True
+) -> AsyncGenerator[bytes, None]:
     """
     Generator for converting Kiro stream to OpenAI format.
 
@@ -180,19 +377,18 @@ async def stream_kiro_to_openai(
         auth_manager: Authentication manager
         request_messages: Original request messages (for fallback token counting)
         request_tools: Original request tools (for fallback token counting)
+        include_usage: Send usage in the final chunk; when False no tokens are counted
 
     Yields:
-        Strings in SSE format: "data: {...}\\n\\n" or "data: [DONE]\\n\\n"
+        UTF-8 encoded SSE frames: b"data: {...}\\n\\n" or b"data: [DONE]\\n\\n"
     """
-    completion_id = generate_completion_id()
-    created_time = int(time.time())
-    first_chunk = True
+    # id, created and model are fixed for the request: encode them once
+    chunk_prefix = _chunk_prefix(generate_completion_id(), int(time.time()), model)
 
     parser = AwsEventStreamParser()
     metering_data = None
     context_usage_percentage = None
-    content_parts: list[str] = []
-    reasoning_parts: list[str] = []
+    accumulator = StreamingCompletionAccumulator(count_tokens=include_usage)
 
     thinking_parser: Optional[ThinkingParser] = None
     if FAKE_REASONING_ENABLED:
@@ -201,301 +397,143 @@ async def stream_kiro_to_openai(
     adaptive_first_token_timeout = get_adaptive_timeout(model, settings.first_token_timeout)
     adaptive_stream_read_timeout = get_adaptive_timeout(model, settings.stream_read_timeout)
 
+    loop = asyncio.get_running_loop()
+    coalescer = _DeltaCoalescer(
+        chunk_prefix, settings.stream_coalesce_ms / 1000, settings.stream_coalesce_max_chars
+    )
+    producer: Optional[asyncio.Task] = None
+
     try:
         byte_iterator = response.aiter_bytes()
 
         try:
-            first_byte_chunk = await asyncio.wait_for(
-                byte_iterator.__anext__(),
-                timeout=adaptive_first_token_timeout
+            chunk: Optional[bytes] = await _await_with_timeout(
+                byte_iterator.__anext__(), adaptive_first_token_timeout
             )
         except asyncio.TimeoutError:
             logger.warning(f"First token timeout after {adaptive_first_token_timeout}s (model: {model})")
             raise FirstTokenTimeoutError(f"No response within {adaptive_first_token_timeout}s")
         except StopAsyncIteration:
             logger.debug("Empty response from Kiro API")
-            yield "data: [DONE]\n\n"
+            yield SSE_DONE
             return
 
-        events = parser.feed(first_byte_chunk)
-        for event in events:
-            if event["type"] == "content":
-                content = event["data"]
-                if thinking_parser:
-                    parse_result = thinking_parser.feed(content)
-
-                    if parse_result.thinking_content:
-                        processed_thinking = thinking_parser.process_for_output(
-                            parse_result.thinking_content,
-                            parse_result.is_first_thinking_chunk,
-                            parse_result.is_last_thinking_chunk,
-                        )
-                        if processed_thinking:
-                            if FAKE_REASONING_HANDLING == "as_reasoning_content":
-                                reasoning_parts.append(processed_thinking)
-                                delta = {"reasoning_content": processed_thinking}
-                            else:
-                                content_parts.append(processed_thinking)
-                                delta = {"content": processed_thinking}
-
-                            if first_chunk:
-                                delta["role"] = "assistant"
-                                first_chunk = False
-
-                            openai_chunk = {
-                                "id": completion_id,
-                                "object": "chat.completion.chunk",
-                                "created": created_time,
-                                "model": model,
-                                "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                            }
-
-                            yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-
-                    if parse_result.regular_content:
-                        content_parts.append(parse_result.regular_content)
-
-                        delta = {"content": parse_result.regular_content}
-                        if first_chunk:
-                            delta["role"] = "assistant"
-                            first_chunk = False
-
-                        openai_chunk = {
-                            "id": completion_id,
-                            "object": "chat.completion.chunk",
-                            "created": created_time,
-                            "model": model,
-                            "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                        }
-
-                        yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-                else:
-                    content_parts.append(content)
-
-                    delta = {"content": content}
-                    if first_chunk:
-                        delta["role"] = "assistant"
-                        first_chunk = False
-
-                    openai_chunk = {
-                        "id": completion_id,
-                        "object": "chat.completion.chunk",
-                        "created": created_time,
-                        "model": model,
-                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                    }
-
-                    yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-
-            elif event["type"] == "usage":
-                metering_data = event["data"]
-
-            elif event["type"] == "context_usage":
-                context_usage_percentage = event["data"]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_READ_AHEAD_CHUNKS)
+        producer = asyncio.create_task(_pump_chunks(byte_iterator, queue))
 
         consecutive_timeouts = 0
         max_consecutive_timeouts = 3
         while True:
-            try:
-                chunk = await _read_chunk_with_timeout(byte_iterator, adaptive_stream_read_timeout)
+            if chunk is None:
+                timeout = adaptive_stream_read_timeout
+                if coalescer.pending:
+                    remaining = coalescer.deadline - loop.time()
+                    if remaining <= 0:
+                        yield coalescer.flush()
+                    else:
+                        timeout = min(timeout, remaining)
+
+                try:
+                    item = await _await_with_timeout(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if coalescer.pending:
+                        yield coalescer.flush()
+                        continue
+
+                    consecutive_timeouts += 1
+                    if consecutive_timeouts <= max_consecutive_timeouts:
+                        logger.warning(
+                            f"Stream read timeout {consecutive_timeouts}/{max_consecutive_timeouts} "
+                            f"after {adaptive_stream_read_timeout}s (model: {model}). "
+                            f"Model may be processing large content - continuing to wait..."
+                        )
+                        continue
+                    else:
+                        logger.error(
+                            f"Stream read timeout after {max_consecutive_timeouts} consecutive timeouts (model: {model})"
+                        )
+                        raise StreamReadTimeoutError(f"Stream read timeout after {adaptive_stream_read_timeout}s")
+
                 consecutive_timeouts = 0
-            except StopAsyncIteration:
-                break
-            except StreamReadTimeoutError as e:
-                consecutive_timeouts += 1
-                if consecutive_timeouts <= max_consecutive_timeouts:
-                    logger.warning(
-                        f"Stream read timeout {consecutive_timeouts}/{max_consecutive_timeouts} "
-                        f"after {adaptive_stream_read_timeout}s (model: {model}). "
-                        f"Model may be processing large content - continuing to wait..."
-                    )
-                    continue
-                else:
-                    logger.error(f"Stream read timeout after {max_consecutive_timeouts} consecutive timeouts (model: {model}): {e}")
-                    raise
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                chunk = item
 
             events = parser.feed(chunk)
+            chunk = None
 
             for event in events:
                 if event["type"] == "content":
                     content = event["data"]
                     if thinking_parser:
-                        parse_result = thinking_parser.feed(content)
-
-                        if parse_result.thinking_content:
-                            processed_thinking = thinking_parser.process_for_output(
-                                parse_result.thinking_content,
-                                parse_result.is_first_thinking_chunk,
-                                parse_result.is_last_thinking_chunk,
-                            )
-                            if processed_thinking:
-                                if FAKE_REASONING_HANDLING == "as_reasoning_content":
-                                    reasoning_parts.append(processed_thinking)
-                                    delta = {"reasoning_content": processed_thinking}
-                                else:
-                                    content_parts.append(processed_thinking)
-                                    delta = {"content": processed_thinking}
-
-                                if first_chunk:
-                                    delta["role"] = "assistant"
-                                    first_chunk = False
-
-                                openai_chunk = {
-                                    "id": completion_id,
-                                    "object": "chat.completion.chunk",
-                                    "created": created_time,
-                                    "model": model,
-                                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                                }
-
-                                yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-
-                        if parse_result.regular_content:
-                            content_parts.append(parse_result.regular_content)
-
-                            delta = {"content": parse_result.regular_content}
-                            if first_chunk:
-                                delta["role"] = "assistant"
-                                first_chunk = False
-
-                            openai_chunk = {
-                                "id": completion_id,
-                                "object": "chat.completion.chunk",
-                                "created": created_time,
-                                "model": model,
-                                "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                            }
-
-                            yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
+                        deltas = _thinking_deltas(thinking_parser, thinking_parser.feed(content))
                     else:
-                        content_parts.append(content)
-
-                        delta = {"content": content}
-                        if first_chunk:
-                            delta["role"] = "assistant"
-                            first_chunk = False
+                        deltas = (("content", content),)
 
-                        openai_chunk = {
-                            "id": completion_id,
-                            "object": "chat.completion.chunk",
-                            "created": created_time,
-                            "model": model,
-                            "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                        }
+                    for kind, text in deltas:
+                        accumulator.feed(text, scan_tool_calls=(kind == "content"))
+                        frames = coalescer.add(kind, text, loop.time())
+                        if frames:
+                            yield frames
+                    continue
 
-                        yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
+                if coalescer.pending:
+                    yield coalescer.flush()
 
-                elif event["type"] == "usage":
+                if event["type"] == "usage":
                     metering_data = event["data"]
 
                 elif event["type"] == "context_usage":
                     context_usage_percentage = event["data"]
 
         if thinking_parser:
-            final_result = thinking_parser.finalize()
-
-            if final_result.thinking_content:
-                processed_thinking = thinking_parser.process_for_output(
-                    final_result.thinking_content,
-                    final_result.is_first_thinking_chunk,
-                    final_result.is_last_thinking_chunk,
-                )
-                if processed_thinking:
-                    if FAKE_REASONING_HANDLING == "as_reasoning_content":
-                        reasoning_parts.append(processed_thinking)
-                        delta = {"reasoning_content": processed_thinking}
-                    else:
-                        content_parts.append(processed_thinking)
-                        delta = {"content": processed_thinking}
-
-                    if first_chunk:
-                        delta["role"] = "assistant"
-                        first_chunk = False
-
-                    openai_chunk = {
-                        "id": completion_id,
-                        "object": "chat.completion.chunk",
-                        "created": created_time,
-                        "model": model,
-                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                    }
-
-                    yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-
-            if final_result.regular_content:
-                content_parts.append(final_result.regular_content)
+            for kind, text in _thinking_deltas(thinking_parser, thinking_parser.finalize()):
+                accumulator.feed(text, scan_tool_calls=(kind == "content"))
+                frames = coalescer.add(kind, text, loop.time())
+                if frames:
+                    yield frames
 
-                delta = {"content": final_result.regular_content}
-                if first_chunk:
-                    delta["role"] = "assistant"
-                    first_chunk = False
+        if coalescer.pending:
+            yield coalescer.flush()
 
-                openai_chunk = {
-                    "id": completion_id,
-                    "object": "chat.completion.chunk",
-                    "created": created_time,
-                    "model": model,
-                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
-                }
-
-                yield f"data: {json.dumps(openai_chunk, ensure_ascii=False)}\n\n"
-
-        full_content = ''.join(content_parts)
-        full_reasoning_content = ''.join(reasoning_parts)
-
-        bracket_tool_calls = parse_bracket_tool_calls(full_content)
+        completion_tokens, bracket_tool_calls = accumulator.finalize()
         all_tool_calls = parser.get_tool_calls() + bracket_tool_calls
         all_tool_calls = deduplicate_tool_calls(all_tool_calls)
 
         finish_reason = "tool_calls" if all_tool_calls else "stop"
 
-        usage_info = _calculate_usage_tokens(
-            full_content, full_reasoning_content, context_usage_percentage, model_cache, model,
-            request_messages, request_tools
-        )
-
         if all_tool_calls:
             logger.debug(f"Processing {len(all_tool_calls)} tool calls for streaming response")
-            indexed_tool_calls = _format_tool_calls_for_streaming(all_tool_calls)
-
-            tool_calls_chunk = {
-                "id": completion_id,
-                "object": "chat.completion.chunk",
-                "created": created_time,
-                "model": model,
-                "choices": [{
-                    "index": 0,
-                    "delta": {"tool_calls": indexed_tool_calls},
-                    "finish_reason": None
-                }]
-            }
-            yield f"data: {json.dumps(tool_calls_chunk, ensure_ascii=False)}\n\n"
-
-        final_chunk = {
-            "id": completion_id,
-            "object": "chat.completion.chunk",
-            "created": created_time,
-            "model": model,
-            "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
-            "usage": {
+            indexed_tool_calls = _format_tool_calls(all_tool_calls, indexed=True)
+
+            yield _delta_frame(chunk_prefix, {"tool_calls": indexed_tool_calls})
+
+        usage = None
+        if include_usage:
+            usage_info = _calculate_usage_tokens(
+                completion_tokens, context_usage_percentage, model_cache, model,
+                request_messages, request_tools
+            )
+
+            usage = {
                 "prompt_tokens": usage_info["prompt_tokens"],
                 "completion_tokens": usage_info["completion_tokens"],
                 "total_tokens": usage_info["total_tokens"],
             }
-        }
-
-        if metering_data:
-            final_chunk["usage"]["credits_used"] = metering_data
-
-        logger.debug(
-            f"[Usage] {model}: "
-            f"prompt_tokens={usage_info['prompt_tokens']} ({usage_info['prompt_source']}), "
-            f"completion_tokens={usage_info['completion_tokens']}, "
-            f"total_tokens={usage_info['total_tokens']} ({usage_info['total_source']})"
-        )
+            if metering_data:
+                usage["credits_used"] = metering_data
+
+            logger.debug(
+                f"[Usage] {model}: "
+                f"prompt_tokens={usage_info['prompt_tokens']} ({usage_info['prompt_source']}), "
+                f"completion_tokens={usage_info['completion_tokens']}, "
+                f"total_tokens={usage_info['total_tokens']} ({usage_info['total_source']})"
+            )
 
-        yield f"data: {json.dumps(final_chunk, ensure_ascii=False)}\n\n"
-        yield "data: [DONE]\n\n"
+        yield _final_chunk_frame(chunk_prefix, finish_reason, usage)
+        yield SSE_DONE
 
     except FirstTokenTimeoutError:
         raise
@@ -504,6 +542,11 @@ async def stream_kiro_to_openai(
     except Exception as e:
         logger.error(f"Error during streaming: {e}", exc_info=True)
     finally:
+        if producer is not None:
+            producer.cancel()
+            # The producer may be inside byte_iterator.__anext__(); let it unwind
+            # before closing the stream it is reading from
+            await asyncio.gather(producer, return_exceptions=True)
         await response.aclose()
         logger.debug("Streaming completed")
 
@@ -538,8 +581,9 @@ async def collect_stream_response(
     parser = AwsEventStreamParser()
     metering_data = None
     context_usage_percentage = None
-    content_parts: list[str] = []
+    content_buf = bytearray()
     reasoning_parts: list[str] = []
+    accumulator = StreamingCompletionAccumulator()
 
     thinking_parser: Optional[ThinkingParser] = None
     if FAKE_REASONING_ENABLED:
@@ -547,6 +591,14 @@ async def collect_stream_response(
 
     adaptive_stream_read_timeout = get_adaptive_timeout(model, settings.stream_read_timeout)
 
+    def add_deltas(deltas) -> None:
+        for kind, text in deltas:
+            accumulator.feed(text, scan_tool_calls=(kind == "content"))
+            if kind == "reasoning_content":
+                reasoning_parts.append(text)
+            else:
+                content_buf.extend(text.encode("utf-8", "surrogatepass"))
+
     try:
         async for chunk in response.aiter_bytes():
             events = parser.feed(chunk)
@@ -555,23 +607,9 @@ async def collect_stream_response(
                 if event["type"] == "content":
                     content = event["data"]
                     if thinking_parser:
-                        parse_result = thinking_parser.feed(content)
-                        if parse_result.thinking_content:
-                            processed_thinking = thinking_parser.process_for_output(
-                                parse_result.thinking_content,
-                                parse_result.is_first_thinking_chunk,
-                                parse_result.is_last_thinking_chunk,
-                            )
-                            if processed_thinking:
-                                if FAKE_REASONING_HANDLING == "as_reasoning_content":
-                                    reasoning_parts.append(processed_thinking)
-                                else:
-                                    content_parts.append(processed_thinking)
-
-                        if parse_result.regular_content:
-                            content_parts.append(parse_result.regular_content)
+                        add_deltas(_thinking_deltas(thinking_parser, thinking_parser.feed(content)))
                     else:
-                        content_parts.append(content)
+                        add_deltas((("content", content),))
                 elif event["type"] == "usage":
                     metering_data = event["data"]
                 elif event["type"] == "context_usage":
@@ -581,33 +619,19 @@ async def collect_stream_response(
         await response.aclose()
 
     if thinking_parser:
-        final_result = thinking_parser.finalize()
-        if final_result.thinking_content:
-            processed_thinking = thinking_parser.process_for_output(
-                final_result.thinking_content,
-                final_result.is_first_thinking_chunk,
-                final_result.is_last_thinking_chunk,
-            )
-            if processed_thinking:
-                if FAKE_REASONING_HANDLING == "as_reasoning_content":
-                    reasoning_parts.append(processed_thinking)
-                else:
-                    content_parts.append(processed_thinking)
-
-        if final_result.regular_content:
-            content_parts.append(final_result.regular_content)
+        add_deltas(_thinking_deltas(thinking_parser, thinking_parser.finalize()))
 
-    full_content = ''.join(content_parts)
+    full_content = content_buf.decode("utf-8", "surrogatepass")
     full_reasoning_content = ''.join(reasoning_parts)
 
-    bracket_tool_calls = parse_bracket_tool_calls(full_content)
+    completion_tokens, bracket_tool_calls = accumulator.finalize()
     all_tool_calls = parser.get_tool_calls() + bracket_tool_calls
     all_tool_calls = deduplicate_tool_calls(all_tool_calls)
 
     finish_reason = "tool_calls" if all_tool_calls else "stop"
 
     usage_info = _calculate_usage_tokens(
-        full_content, full_reasoning_content, context_usage_percentage, model_cache, model,
+        completion_tokens, context_usage_percentage, model_cache, model,
         request_messages, request_tools
     )
 
@@ -620,7 +644,7 @@ async def collect_stream_response(
         message["reasoning_content"] = full_reasoning_content
 
     if all_tool_calls:
-        message["tool_calls"] = _format_tool_calls_for_non_streaming(all_tool_calls)
+        message["tool_calls"] = _format_tool_calls(all_tool_calls, indexed=False)
 
     response_obj = {
         "id": completion_id,
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import re
 from dataclasses import dataclass
 from enum import IntEnum
 from typing import List, Optional
@@ -9,6 +10,7 @@ from loguru import logger
 from app.core.config import (
     FAKE_REASONING_HANDLING,
     FAKE_REASONING_OPEN_TAGS,
+    FAKE_REASONING_TAG_RE,
     FAKE_REASONING_INITIAL_BUFFER_SIZE,
 )
 
@@ -39,7 +41,14 @@ class ThinkingParser:
         self.open_tags = open_tags or FAKE_REASONING_OPEN_TAGS
         self.initial_buffer_size = initial_buffer_size
 
-        self.max_tag_length = max(len(tag) for tag in self.open_tags) * 2
+        # Alternation keeps list order, so the first listed tag wins as before
+        if self.open_tags is FAKE_REASONING_OPEN_TAGS:
+            self._open_tag_re = FAKE_REASONING_TAG_RE
+        else:
+            self._open_tag_re = re.compile("|".join(re.escape(tag) for tag in self.open_tags))
+        self._tag_prefixes = frozenset(
+            tag[:i] for tag in self.open_tags for i in range(len(tag))
+        )
 
         self.state = ParserState.PRE_CONTENT
         self.initial_buffer = ""
@@ -73,34 +82,34 @@ class ThinkingParser:
 
         stripped = self.initial_buffer.lstrip()
 
-        for tag in self.open_tags:
-            if stripped.startswith(tag):
-                self.state = ParserState.IN_THINKING
-                self.open_tag = tag
-                self.close_tag = f"</{tag[1:]}"
-                self._thinking_block_found = True
-                result.state_changed = True
+        match = self._open_tag_re.match(stripped)
+        if match:
+            tag = match.group(0)
+            self.state = ParserState.IN_THINKING
+            self.open_tag = tag
+            self.close_tag = f"</{tag[1:]}"
+            self._thinking_block_found = True
+            result.state_changed = True
 
-                logger.debug(f"Thinking tag '{tag}' detected. Transitioning to IN_THINKING.")
+            logger.debug(f"Thinking tag '{tag}' detected. Transitioning to IN_THINKING.")
 
-                content_after_tag = stripped[len(tag):]
-                self.thinking_buffer = content_after_tag
-                self.initial_buffer = ""
+            content_after_tag = stripped[len(tag):]
+            self.thinking_buffer = content_after_tag
+            self.initial_buffer = ""
 
-                thinking_result = self._process_thinking_buffer()
-                if thinking_result.thinking_content:
-                    result.thinking_content = thinking_result.thinking_content
-                    result.is_first_thinking_chunk = thinking_result.is_first_thinking_chunk
-                if thinking_result.is_last_thinking_chunk:
-                    result.is_last_thinking_chunk = True
-                if thinking_result.regular_content:
-                    result.regular_content = thinking_result.regular_content
+            thinking_result = self._process_thinking_buffer()
+            if thinking_result.thinking_content:
+                result.thinking_content = thinking_result.thinking_content
+                result.is_first_thinking_chunk = thinking_result.is_first_thinking_chunk
+            if thinking_result.is_last_thinking_chunk:
+                result.is_last_thinking_chunk = True
+            if thinking_result.regular_content:
+                result.regular_content = thinking_result.regular_content
 
-                return result
+            return result
 
-        for tag in self.open_tags:
-            if tag.startswith(stripped) and len(stripped) < len(tag):
-                return result
+        if stripped in self._tag_prefixes:
+            return result
 
         if len(self.initial_buffer) > self.initial_buffer_size or not self._could_be_tag_prefix(stripped):
             self.state = ParserState.STREAMING
@@ -114,10 +123,7 @@ class ThinkingParser:
     def _could_be_tag_prefix(self, text: str) -> bool:
         if not text:
             return True
-        for tag in self.open_tags:
-            if tag.startswith(text):
-                return True
-        return False
+        return text in self._tag_prefixes or self._open_tag_re.fullmatch(text) is not None
 
     def _handle_in_thinking(self, content: str) -> ThinkingParseResult:
         self.thinking_buffer += content
@@ -128,8 +134,8 @@ class ThinkingParser:
         if not self.close_tag:
             return result
 
-        if self.close_tag in self.thinking_buffer:
-            idx = self.thinking_buffer.find(self.close_tag)
+        idx = self.thinking_buffer.find(self.close_tag)
+        if idx != -1:
             thinking_content = self.thinking_buffer[:idx]
             after_tag = self.thinking_buffer[idx + len(self.close_tag):]
 
@@ -153,9 +159,11 @@ class ThinkingParser:
 
             return result
 
-        if len(self.thinking_buffer) > self.max_tag_length:
-            send_part = self.thinking_buffer[:-self.max_tag_length]
-            self.thinking_buffer = self.thinking_buffer[-self.max_tag_length:]
+        # Only a partial close tag at the very end has to be held back
+        split = len(self.thinking_buffer) - (len(self.close_tag) - 1)
+        if split > 0:
+            send_part = self.thinking_buffer[:split]
+            self.thinking_buffer = self.thinking_buffer[split:]
 
             result.thinking_content = send_part
             result.is_first_thinking_chunk = self.is_first_thinking_chunk
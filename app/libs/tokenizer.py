@@ -6,13 +6,27 @@ Uses tiktoken (OpenAI's Rust-based library) for approximate token counting.
 The cl100k_base encoding is close to Claude tokenization.
 """
 
+import functools
+import os
 from typing import List, Dict, Any, Optional
 from loguru import logger
 
+from app.core.config import settings
+from app.utils import fast_json
+
 _encoding = None
 
 CLAUDE_CORRECTION_FACTOR = 1.15
 
+# CLAUDE_CORRECTION_FACTOR as an exact ratio, so correction stays in integer arithmetic
+_CLAUDE_CORRECTION_NUM = 23
+_CLAUDE_CORRECTION_DEN = 20
+
+# Below this many characters a thread pool for batch encoding costs more than it saves
+_BATCH_MIN_CHARS = 64 * 1024
+
+_BATCH_THREADS = os.cpu_count() or 1
+
 
 def _get_encoding():
     """
@@ -26,6 +40,8 @@ def _get_encoding():
     """
     global _encoding
     if _encoding is None:
+        if settings.tiktoken_cache_dir:
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", settings.tiktoken_cache_dir)
         try:
             import tiktoken
             _encoding = tiktoken.get_encoding("cl100k_base")
@@ -43,6 +59,18 @@ def _get_encoding():
     return _encoding if _encoding else None
 
 
+def warm_up() -> None:
+    """
+    Load the encoding and run one encode so the first request does not pay for it.
+
+    Loading cl100k_base reads (or downloads) the vocabulary and builds the
+    BPE tables; this runs it at startup instead.
+    """
+    encoding = _get_encoding()
+    if encoding:
+        encoding.encode_ordinary("warmup")
+
+
 def count_tokens(text: str, apply_claude_correction: bool = True) -> int:
     """
     Count number of tokens in text.
@@ -62,17 +90,93 @@ def count_tokens(text: str, apply_claude_correction: bool = True) -> int:
         try:
             base_tokens = len(encoding.encode(text))
             if apply_claude_correction:
-                return int(base_tokens * CLAUDE_CORRECTION_FACTOR)
+                return base_tokens * _CLAUDE_CORRECTION_NUM // _CLAUDE_CORRECTION_DEN
             return base_tokens
         except Exception as e:
             logger.warning(f"[Tokenizer] Error encoding text: {e}")
 
     base_estimate = len(text) // 4 + 1
     if apply_claude_correction:
-        return int(base_estimate * CLAUDE_CORRECTION_FACTOR)
+        return base_estimate * _CLAUDE_CORRECTION_NUM // _CLAUDE_CORRECTION_DEN
     return base_estimate
 
 
+def _encode_batch_lens(strings: List[str]) -> List[int]:
+    """
+    Count tokens (without Claude correction) for several strings at once.
+
+    Large batches go through encode_ordinary_batch, which encodes in
+    parallel with the GIL released; small ones are encoded in a plain loop.
+
+    Args:
+        strings: Texts to count
+
+    Returns:
+        Token count for each string, in order
+    """
+    encoding = _get_encoding()
+    if encoding:
+        try:
+            if sum(map(len, strings)) >= _BATCH_MIN_CHARS and hasattr(encoding, "encode_ordinary_batch"):
+                return [len(ids) for ids in encoding.encode_ordinary_batch(strings, num_threads=_BATCH_THREADS)]
+            return [len(encoding.encode_ordinary(text)) for text in strings]
+        except Exception as e:
+            logger.warning(f"[Tokenizer] Error encoding text: {e}")
+
+    return [len(text) // 4 + 1 for text in strings]
+
+
+class IncrementalCounter:
+    """
+    Running token count for text that arrives in fragments.
+
+    Each fragment is encoded once as it arrives, so the full text never has
+    to be joined and re-encoded. Counts are summed per fragment, which can
+    differ slightly from encoding the joined text at fragment boundaries.
+    """
+
+    def __init__(self):
+        self._encoding = _get_encoding()
+        self.count = 0
+        self._fallback_chars = 0
+
+    def feed(self, text: str) -> None:
+        """
+        Add a text fragment to the count.
+
+        Args:
+            text: Text fragment
+        """
+        if not text:
+            return
+
+        if self._encoding:
+            try:
+                self.count += len(self._encoding.encode_ordinary(text))
+                return
+            except Exception as e:
+                logger.warning(f"[Tokenizer] Error encoding text: {e}")
+
+        self._fallback_chars += len(text)
+
+    def result(self, apply_claude_correction: bool = True) -> int:
+        """
+        Get the token count for all fragments fed so far.
+
+        Args:
+            apply_claude_correction: Apply correction factor for Claude (default True)
+
+        Returns:
+            Number of tokens (approximate, with Claude correction)
+        """
+        total = self.count
+        if self._fallback_chars:
+            total += self._fallback_chars // 4 + 1
+        if apply_claude_correction:
+            return total * _CLAUDE_CORRECTION_NUM // _CLAUDE_CORRECTION_DEN
+        return total
+
+
 def count_message_tokens(messages: List[Dict[str, Any]], apply_claude_correction: bool = True) -> int:
     """
     Count tokens in chat message list.
@@ -88,22 +192,22 @@ def count_message_tokens(messages: List[Dict[str, Any]], apply_claude_correction
         return 0
 
     total_tokens = 0
+    strings: List[str] = []
 
     for message in messages:
         total_tokens += 4
 
-        role = message.get("role", "")
-        total_tokens += count_tokens(role, apply_claude_correction=False)
+        strings.append(message.get("role", ""))
 
         content = message.get("content")
         if content:
             if isinstance(content, str):
-                total_tokens += count_tokens(content, apply_claude_correction=False)
+                strings.append(content)
             elif isinstance(content, list):
                 for item in content:
                     if isinstance(item, dict):
                         if item.get("type") == "text":
-                            total_tokens += count_tokens(item.get("text", ""), apply_claude_correction=False)
+                            strings.append(item.get("text", ""))
                         elif item.get("type") == "image_url":
                             total_tokens += 100
 
@@ -112,19 +216,52 @@ def count_message_tokens(messages: List[Dict[str, Any]], apply_claude_correction
             for tc in tool_calls:
                 total_tokens += 4
                 func = tc.get("function", {})
-                total_tokens += count_tokens(func.get("name", ""), apply_claude_correction=False)
-                total_tokens += count_tokens(func.get("arguments", ""), apply_claude_correction=False)
+                strings.append(func.get("name", ""))
+                strings.append(func.get("arguments", ""))
 
         if message.get("tool_call_id"):
-            total_tokens += count_tokens(message["tool_call_id"], apply_claude_correction=False)
+            strings.append(message["tool_call_id"])
 
+    total_tokens += sum(_encode_batch_lens([text for text in strings if text]))
     total_tokens += 3
 
     if apply_claude_correction:
-        return int(total_tokens * CLAUDE_CORRECTION_FACTOR)
+        return total_tokens * _CLAUDE_CORRECTION_NUM // _CLAUDE_CORRECTION_DEN
     return total_tokens
 
 
+def _count_tools_base_tokens(tools: List[Dict[str, Any]]) -> int:
+    """Count tokens in tool definitions without Claude correction."""
+    total_tokens = 0
+    strings: List[str] = []
+
+    for tool in tools:
+        total_tokens += 4
+
+        if tool.get("type") == "function":
+            func = tool.get("function", {})
+
+            strings.append(func.get("name", ""))
+            strings.append(func.get("description", ""))
+
+            params = func.get("parameters")
+            if params:
+                strings.append(fast_json.dumps(params))
+
+    return total_tokens + sum(_encode_batch_lens([text for text in strings if text]))
+
+
+@functools.lru_cache(maxsize=64)
+def _count_tools_tokens_cached(tools_json: bytes) -> int:
+    """
+    Count tokens for serialized tool definitions.
+
+    Tool lists are usually identical across requests, so the serialized
+    list is the cache key and repeat requests skip encoding entirely.
+    """
+    return _count_tools_base_tokens(fast_json.loads(tools_json))
+
+
 def count_tools_tokens(tools: Optional[List[Dict[str, Any]]], apply_claude_correction: bool = True) -> int:
     """
     Count tokens in tool definitions.
@@ -139,25 +276,13 @@ def count_tools_tokens(tools: Optional[List[Dict[str, Any]]], apply_claude_corre
     if not tools:
         return 0
 
-    total_tokens = 0
-
-    for tool in tools:
-        total_tokens += 4
-
-        if tool.get("type") == "function":
-            func = tool.get("function", {})
-
-            total_tokens += count_tokens(func.get("name", ""), apply_claude_correction=False)
-            total_tokens += count_tokens(func.get("description", ""), apply_claude_correction=False)
-
-            params = func.get("parameters")
-            if params:
-                import json
-                params_str = json.dumps(params, ensure_ascii=False)
-                total_tokens += count_tokens(params_str, apply_claude_correction=False)
+    try:
+        total_tokens = _count_tools_tokens_cached(fast_json.dumps_bytes(tools))
+    except (TypeError, ValueError):
+        total_tokens = _count_tools_base_tokens(tools)
 
     if apply_claude_correction:
-        return int(total_tokens * CLAUDE_CORRECTION_FACTOR)
+        return total_tokens * _CLAUDE_CORRECTION_NUM // _CLAUDE_CORRECTION_DEN
     return total_tokens
 
 
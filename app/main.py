@@ -15,6 +15,7 @@ import sys
 import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
@@ -27,9 +28,11 @@ from app.core.config import (
     settings,
 )
 from app.core.exceptions import validation_exception_handler
+from app.core.responses import FastJSONResponse
 from app.libs.auth import KiroAuthManager
 from app.libs.cache import ModelInfoCache
-from app.libs.http_client import close_global_http_client
+from app.libs.http_client import KiroHttpClient, close_global_http_client, global_http_client_manager
+from app.libs import tokenizer
 from app.middleware.tracking import RequestTrackingMiddleware
 from app.routes import router
 
@@ -40,10 +43,17 @@ logger.add(
     sys.stderr,
     level=settings.log_level,
     colorize=True,
+    enqueue=settings.log_enqueue,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 )
 
 
+# Loguru depth per logging call site (pathname, lineno). The number of
+# logging-module frames between a call site and emit() never changes, so the
+# stack walk runs once per site instead of once per record.
+_INTERCEPT_DEPTH_CACHE: dict = {}
+
+
 class InterceptHandler(logging.Handler):
     """Intercept standard logging and redirect to loguru."""
 
@@ -53,10 +63,14 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        site = (record.pathname, record.lineno)
+        depth = _INTERCEPT_DEPTH_CACHE.get(site)
+        if depth is None:
+            frame, depth = logging.currentframe(), 2
+            while frame.f_code.co_filename == logging.__file__:
+                frame = frame.f_back
+                depth += 1
+            _INTERCEPT_DEPTH_CACHE[site] = depth
 
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
@@ -99,20 +113,23 @@ def _print_startup_banner():
 
     print(banner)
 
-    logger.info("=" * 60)
-    logger.info("🚀 Kiro-2API started successfully!")
-    logger.info("=" * 60)
-    logger.info("📍 Endpoints:")
-    logger.info(f"   • Local: http://127.0.0.1:{settings.port}")
-    logger.info(f"   • Network: http://0.0.0.0:{settings.port}")
-    logger.info("📖 API Documentation:")
-    logger.info(f"   • Swagger UI: http://127.0.0.1:{settings.port}/docs")
-    logger.info("=" * 60)
+    separator = "=" * 60
+    logger.info("\n".join([
+        separator,
+        "🚀 Kiro-2API started successfully!",
+        separator,
+        "📍 Endpoints:",
+        f"   • Local: http://127.0.0.1:{settings.port}",
+        f"   • Network: http://0.0.0.0:{settings.port}",
+        "📖 API Documentation:",
+        f"   • Swagger UI: http://127.0.0.1:{settings.port}/docs",
+        separator,
+    ]))
 
 
 # --- Configuration Validation ---
-def validate_configuration() -> None:
-    """Validate required configuration exists."""
+def _validate_required_env() -> None:
+    """Validate required configuration exists (settings lookups only, runs at import)."""
     errors = []
 
     if not settings.proxy_api_key:
@@ -123,17 +140,6 @@ def validate_configuration() -> None:
             "This is the password used to authenticate API requests."
         )
 
-    has_refresh_token = bool(settings.refresh_token)
-    has_creds_file = bool(settings.kiro_creds_file)
-
-    if settings.kiro_creds_file:
-        is_url = settings.kiro_creds_file.startswith(('http://', 'https://'))
-        if not is_url:
-            creds_path = Path(settings.kiro_creds_file).expanduser()
-            if not creds_path.exists():
-                has_creds_file = False
-                logger.warning(f"KIRO_CREDS_FILE not found: {settings.kiro_creds_file}")
-
     if errors:
         logger.error("")
         logger.error("=" * 60)
@@ -146,6 +152,25 @@ def validate_configuration() -> None:
         logger.error("")
         sys.exit(1)
 
+
+def _validate_runtime_resources() -> None:
+    """
+    Check the credentials source on disk and log the resulting auth mode.
+
+    Runs at application startup rather than import, so importing app.main
+    (tests, worker reloads) does no filesystem checks. Only logs; never exits.
+    """
+    has_refresh_token = bool(settings.refresh_token)
+    has_creds_file = bool(settings.kiro_creds_file)
+
+    if settings.kiro_creds_file:
+        is_url = settings.kiro_creds_file.startswith(('http://', 'https://'))
+        if not is_url:
+            creds_path = Path(settings.kiro_creds_file).expanduser()
+            if not creds_path.exists():
+                has_creds_file = False
+                logger.warning(f"KIRO_CREDS_FILE not found: {settings.kiro_creds_file}")
+
     config_source = "environment variables" if not Path(".env").exists() else ".env file"
 
     if has_refresh_token or has_creds_file:
@@ -163,7 +188,7 @@ def validate_configuration() -> None:
         logger.info("Tip: Configure REFRESH_TOKEN to enable simple mode authentication")
 
 
-validate_configuration()
+_validate_required_env()
 
 
 # --- Lifecycle Manager ---
@@ -172,8 +197,7 @@ async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
     logger.info("Starting application... Creating state managers.")
 
-    debug_dir = Path(settings.debug_dir)
-    debug_dir.mkdir(parents=True, exist_ok=True)
+    _validate_runtime_resources()
 
     has_global_credentials = bool(settings.refresh_token) or bool(settings.kiro_creds_file)
 
@@ -185,34 +209,54 @@ async def lifespan(app: FastAPI):
     )
     app.state.auth_manager = auth_manager
 
+    # Shared upstream connection pool, created up front and closed on shutdown
+    app.state.http_client = await global_http_client_manager.get_client()
+    # Kiro client for the global auth manager, reused across requests (keeps its header cache)
+    app.state.kiro_client = KiroHttpClient(auth_manager, app.state.http_client)
+
     model_cache = ModelInfoCache()
     model_cache.set_auth_manager(auth_manager)
     app.state.model_cache = model_cache
 
+    # Initial population runs in the background so startup does not wait on
+    # the upstream round-trip; model_cache.is_ready reports when it finished
+    initial_refresh: Optional[asyncio.Task] = None
+    if has_global_credentials and model_cache.is_empty():
+        logger.info("Performing initial model cache population in background...")
+        initial_refresh = asyncio.create_task(model_cache.refresh())
+
+    # Independent local setup: debug directory and tokenizer vocabulary (off the event loop)
+    await asyncio.gather(
+        asyncio.to_thread(Path(settings.debug_dir).mkdir, parents=True, exist_ok=True),
+        asyncio.to_thread(tokenizer.warm_up),
+    )
+
     if has_global_credentials:
         await model_cache.start_background_refresh()
-
-        if model_cache.is_empty():
-            logger.info("Performing initial model cache population...")
-            await model_cache.refresh()
     else:
         logger.warning("No global credentials configured - model cache refresh disabled")
         logger.warning("Simple mode authentication will not work, only multi-tenant mode available")
 
     logger.info("Application startup complete.")
 
-    _print_startup_banner()
+    # Written on the next loop iteration, after startup has been reported to the server
+    asyncio.get_running_loop().call_soon(_print_startup_banner)
 
     yield
 
     logger.info("Shutting down application...")
 
+    if initial_refresh is not None and not initial_refresh.done():
+        initial_refresh.cancel()
+
     if has_global_credentials:
         await model_cache.stop_background_refresh()
 
     await close_global_http_client()
 
     logger.info("Application shutdown complete.")
+    # Drain records still queued for the background writer (LOG_ENQUEUE)
+    await logger.complete()
 
 
 # --- FastAPI Application ---
@@ -221,9 +265,13 @@ app = FastAPI(
     description=APP_DESCRIPTION,
     version=APP_VERSION,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
-app.add_middleware(RequestTrackingMiddleware)
+app.add_middleware(
+    RequestTrackingMiddleware,
+    skip_paths=[path.strip() for path in settings.tracking_skip_paths.split(",") if path.strip()],
+)
 
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
@@ -249,12 +297,19 @@ UVICORN_LOG_CONFIG = {
 
 # --- Entry Point ---
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    logger.info(f"Starting Uvicorn server on port {settings.port}...")
+
+    # uvloop and httptools ship with uvicorn[standard]; uvloop is POSIX-only
+    loop_impl = "uvloop" if sys.platform != "win32" and importlib.util.find_spec("uvloop") else "asyncio"
+    http_impl = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(f"Starting Uvicorn server on port {settings.port} (loop={loop_impl}, http={http_impl})...")
 
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=settings.port,
+        loop=loop_impl,
+        http=http_impl,
         log_config=UVICORN_LOG_CONFIG,
     )
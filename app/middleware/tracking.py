@@ -5,30 +5,38 @@ Request tracking middleware.
 Adds unique ID to each request for log correlation and debugging.
 """
 
+import os
 import time
-import uuid
-from datetime import datetime
-from typing import Callable
+from typing import Iterable, Optional
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from loguru import logger
 
 
-def get_timestamp() -> str:
-    """Get formatted timestamp."""
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def get_client_ip(request: Request) -> str:
+    """
+    Extract client IP from request, supporting X-Forwarded-For.
+
+    Scans the raw ASGI header list instead of building request.headers.
+    """
+    forwarded_for: Optional[bytes] = None
+    for name, value in request.scope["headers"]:
+        if name == b"x-forwarded-for":
+            forwarded_for = value
+            break
+    return _scope_client_ip(request.scope, forwarded_for)
 
 
-def get_client_ip(request: Request) -> str:
-    """Extract client IP from request, supporting X-Forwarded-For."""
-    x_forwarded_for = request.headers.get("X-Forwarded-For")
-    if x_forwarded_for:
-        return x_forwarded_for.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+def _scope_client_ip(scope: Scope, forwarded_for: Optional[bytes]) -> str:
+    """Extract client IP from an ASGI scope, supporting X-Forwarded-For."""
+    if forwarded_for:
+        return forwarded_for.split(b",", 1)[0].strip().decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
 
-class RequestTrackingMiddleware(BaseHTTPMiddleware):
+class RequestTrackingMiddleware:
     """
     Request tracking middleware.
 
@@ -37,55 +45,92 @@ class RequestTrackingMiddleware(BaseHTTPMiddleware):
     - Records request start and end time
     - Calculates request processing time
     - Adds request ID context to logs
+
+    Implemented as plain ASGI middleware: unlike BaseHTTPMiddleware it does not
+    run the endpoint in a separate task or wrap the response body in a
+    memory stream, and headers are added on the raw http.response.start message.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp, skip_paths: Iterable[str] = ()):
+        """
+        Args:
+            app: Wrapped ASGI application
+            skip_paths: Exact paths passed straight through without tracking
+        """
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process request and add tracking info.
 
         Args:
-            request: HTTP request
-            call_next: Next middleware or route handler
-
-        Returns:
-            HTTP response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
-        request_id = request.headers.get("X-Request-ID")
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        request_id: Optional[str] = None
+        forwarded_for: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                if request_id is None:
+                    request_id = value.decode("latin-1")
+            elif name == b"x-forwarded-for":
+                if forwarded_for is None:
+                    forwarded_for = value
         if not request_id:
-            request_id = str(uuid.uuid4())
-
-        start_time = time.time()
-        request.state.request_id = request_id
+            request_id = os.urandom(16).hex()
+
+        start_time = time.perf_counter()
+        # Backs request.state.request_id for route handlers
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_tracking_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                # One new list; the original may be a tuple or owned by the response
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", ()),
+                        request_id_header,
+                        (b"x-process-time", f"{process_time:.4f}".encode("ascii")),
+                    ],
+                }
+            await send(message)
 
         with logger.contextualize(request_id=request_id):
-            client_ip = get_client_ip(request)
+            client_ip = _scope_client_ip(scope, forwarded_for)
+            query = scope.get("query_string", b"").decode("latin-1")
             logger.info(
-                f"[{get_timestamp()}] [IP: {client_ip}] Request start: {request.method} {request.url.path}"
-                + (f" Params: {request.url.query}" if request.url.query else "")
+                "[IP: {}] Request start: {} {}{}",
+                client_ip, method, path, f" Params: {query}" if query else ""
             )
 
             try:
-                response = await call_next(request)
-
-                process_time = time.time() - start_time
-
-                response.headers["X-Request-ID"] = request_id
-                response.headers["X-Process-Time"] = str(round(process_time, 4))
-
-                status_text = "success" if 200 <= response.status_code < 400 else "failed"
-                logger.info(
-                    f"[{get_timestamp()}] [IP: {client_ip}] "
-                    f"Request {status_text}: {request.method} {request.url.path} "
-                    f"status={response.status_code} time={process_time:.4f}s"
-                )
-
-                return response
-
+                await self.app(scope, receive, send_with_tracking_headers)
             except Exception as e:
-                process_time = time.time() - start_time
+                process_time = time.perf_counter() - start_time
                 logger.error(
-                    f"[{get_timestamp()}] [IP: {client_ip}] "
-                    f"Request error: {request.method} {request.url.path} "
-                    f"error={str(e)} time={process_time:.4f}s"
+                    "[IP: {}] Request error: {} {} error={} time={:.4f}s",
+                    client_ip, method, path, e, process_time
                 )
                 raise
+
+            process_time = time.perf_counter() - start_time
+            status_text = "success" if 200 <= status_code < 400 else "failed"
+            logger.info(
+                "[IP: {}] Request {}: {} {} status={} time={:.4f}s",
+                client_ip, status_text, method, path, status_code, process_time
+            )
@@ -8,7 +8,7 @@ Defines request and response data schemas with validation and serialization.
 import time
 from typing import Any, Dict, List, Optional, Union
 from typing_extensions import Annotated
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 
 # ==================================================================================================
@@ -54,7 +54,11 @@ class ChatMessage(BaseModel):
     tool_calls: Optional[List[Any]] = None
     tool_call_id: Optional[str] = None
 
-    model_config = {"extra": "allow"}
+    # Parsed (content, (text, images, tool_results)) cache, see converters._parse_message
+    _parsed: Optional[Any] = PrivateAttr(default=None)
+
+    # Converters reassign content while merging; keep assignment unvalidated
+    model_config = {"extra": "allow", "validate_assignment": False}
 
 
 class ToolFunction(BaseModel):
@@ -149,27 +153,22 @@ class ChatCompletionRequest(BaseModel):
         if v is None:
             return v
 
+        # Common case (OpenAI format only): hand the list to field validation untouched
+        if not any(isinstance(tool, dict) and 'input_schema' in tool and 'name' in tool for tool in v):
+            return v
+
         converted_tools = []
         for tool in v:
-            if isinstance(tool, Tool):
-                converted_tools.append(tool)
-                continue
-
-            if isinstance(tool, dict):
-                if 'input_schema' in tool and 'name' in tool:
-                    converted_tool = Tool(
-                        type='function',
-                        function=ToolFunction(
-                            name=tool['name'],
-                            description=tool.get('description'),
-                            parameters=tool['input_schema']
-                        )
-                    )
-                    converted_tools.append(converted_tool)
-                elif 'function' in tool:
-                    converted_tools.append(tool)
-                else:
-                    converted_tools.append(tool)
+            if isinstance(tool, dict) and 'input_schema' in tool and 'name' in tool:
+                # One validation pass for the nested model instead of two constructor calls
+                converted_tools.append(Tool.model_validate({
+                    'type': 'function',
+                    'function': {
+                        'name': tool['name'],
+                        'description': tool.get('description'),
+                        'parameters': tool['input_schema'],
+                    },
+                }))
             else:
                 converted_tools.append(tool)
 
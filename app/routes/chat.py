@@ -1,36 +1,53 @@
 # -*- coding: utf-8 -*-
 """Chat completions routes."""
 
-import json
-import secrets
+import asyncio
 import time
 from typing import Union
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Security
-from fastapi.responses import JSONResponse, StreamingResponse
-from fastapi.security import APIKeyHeader
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from app.core.config import settings
-from app.libs.auth import KiroAuthManager
+from app.core.responses import FastJSONResponse
+from app.core.security import api_key_header, is_valid_proxy_key, mask_token, split_auth_header
+from app.libs.auth import KiroAuthManager, get_tenant_auth_manager
 from app.libs.cache import ModelInfoCache
 from app.libs.http_client import KiroHttpClient
 from app.libs.converters import build_kiro_payload
 from app.libs.streaming import stream_kiro_to_openai, collect_stream_response
 from app.models.schemas import ChatCompletionRequest
+from app.utils import fast_json
 from app.utils.helpers import generate_conversation_id
-from app.middleware.tracking import get_timestamp
 
 router = APIRouter()
 
-api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
-
-
-def _mask_token(token: str) -> str:
-    """Mask token for logging."""
-    if len(token) <= 8:
-        return "***"
-    return f"{token[:4]}...{token[-4:]}"
+# Payload builds above these sizes run in a worker thread instead of the event loop
+_OFFLOAD_MIN_MESSAGES: int = 8
+_OFFLOAD_MIN_CONTENT_CHARS: int = 16_384
+
+
+def _is_large_request(request_data: ChatCompletionRequest) -> bool:
+    """Check whether payload build is heavy enough to be worth a thread hop."""
+    messages = request_data.messages
+    if len(messages) > _OFFLOAD_MIN_MESSAGES:
+        return True
+    for msg in messages:
+        content = msg.content
+        if isinstance(content, str):
+            if len(content) > _OFFLOAD_MIN_CONTENT_CHARS:
+                return True
+        elif isinstance(content, list):
+            # Images and tool results arrive as blocks; a long block list is heavy too
+            if len(content) > _OFFLOAD_MIN_MESSAGES:
+                return True
+            for item in content:
+                if isinstance(item, str) and len(item) > _OFFLOAD_MIN_CONTENT_CHARS:
+                    return True
+                if isinstance(item, dict) and item.get("type") != "text":
+                    return True
+    return False
 
 
 async def verify_api_key(
@@ -42,7 +59,7 @@ async def verify_api_key(
 
     Supports:
     1. Traditional: "Bearer {PROXY_API_KEY}" - uses global AuthManager
-    2. Multi-tenant: "Bearer {PROXY_API_KEY}:{REFRESH_TOKEN}" - creates per-user AuthManager
+    2. Multi-tenant: "Bearer {PROXY_API_KEY}:{REFRESH_TOKEN}" - per-user AuthManager (cached)
 
     Args:
         request: FastAPI Request
@@ -55,38 +72,25 @@ async def verify_api_key(
         HTTPException: 401 if key is invalid or missing
     """
     if not auth_header:
-        logger.warning(f"[{get_timestamp()}] Missing Authorization header")
+        logger.warning("Missing Authorization header")
         raise HTTPException(status_code=401, detail="API Key invalid or missing")
 
-    # Support both "Bearer {token}" format and raw token (for Swagger UI)
-    if auth_header.startswith("Bearer "):
-        token = auth_header[7:]
-    else:
-        token = auth_header
-    proxy_api_key = settings.proxy_api_key
-
-    if ':' in token:
-        parts = token.split(':', 1)
-        proxy_key = parts[0]
-        refresh_token = parts[1]
-
-        if not secrets.compare_digest(proxy_key, proxy_api_key):
-            logger.warning(f"[{get_timestamp()}] Invalid Proxy Key in multi-tenant mode: {_mask_token(proxy_key)}")
+    proxy_key, sep, refresh_token = split_auth_header(auth_header)
+    if sep:
+        if not is_valid_proxy_key(proxy_key):
+            logger.warning("Invalid Proxy Key in multi-tenant mode: {}", mask_token(proxy_key))
             raise HTTPException(status_code=401, detail="API Key invalid or missing")
 
-        logger.debug(f"[{get_timestamp()}] Multi-tenant mode: using custom Refresh Token {_mask_token(refresh_token)}")
-        auth_manager = KiroAuthManager(
-            refresh_token=refresh_token,
-            region=settings.region,
-            profile_arn=settings.profile_arn
+        logger.opt(lazy=True).debug(
+            "Multi-tenant mode: using custom Refresh Token {}", lambda: mask_token(refresh_token)
         )
-        return auth_manager
+        return get_tenant_auth_manager(refresh_token)
 
-    if secrets.compare_digest(token, proxy_api_key):
-        logger.debug(f"[{get_timestamp()}] Traditional mode: using global AuthManager")
+    if is_valid_proxy_key(proxy_key):
+        logger.debug("Traditional mode: using global AuthManager")
         return request.app.state.auth_manager
 
-    logger.warning(f"[{get_timestamp()}] Invalid API Key in traditional mode")
+    logger.warning("Invalid API Key in traditional mode")
     raise HTTPException(status_code=401, detail="API Key invalid or missing")
 
 
@@ -114,7 +118,9 @@ async def chat_completions(
     Raises:
         HTTPException: On validation or API errors
     """
-    logger.info(f"[{get_timestamp()}] Received /v1/chat/completions request (model={request_data.model}, stream={request_data.stream})")
+    logger.info(
+        "Received /v1/chat/completions request (model={}, stream={})", request_data.model, request_data.stream
+    )
 
     request.state.auth_manager = auth_manager
     request.state.model = request_data.model
@@ -124,15 +130,21 @@ async def chat_completions(
     conversation_id = generate_conversation_id()
 
     try:
-        kiro_payload = build_kiro_payload(
-            request_data,
-            conversation_id,
-            auth_manager.profile_arn or ""
-        )
+        profile_arn = auth_manager.profile_arn or ""
+        if _is_large_request(request_data):
+            kiro_payload = await asyncio.to_thread(
+                build_kiro_payload, request_data, conversation_id, profile_arn
+            )
+        else:
+            kiro_payload = build_kiro_payload(request_data, conversation_id, profile_arn)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    http_client = KiroHttpClient(auth_manager)
+    if auth_manager is request.app.state.auth_manager:
+        http_client: KiroHttpClient = request.app.state.kiro_client
+    else:
+        # Multi-tenant: per-user auth manager, still on the shared connection pool
+        http_client = KiroHttpClient(auth_manager, request.app.state.http_client)
     url = f"{auth_manager.api_host}/generateAssistantResponse"
 
     try:
@@ -161,17 +173,17 @@ async def chat_completions(
 
             error_message = error_text
             try:
-                error_json = json.loads(error_text)
+                error_json = fast_json.loads(error_content)
                 if isinstance(error_json, dict):
                     if "message" in error_json:
                         error_message = error_json["message"]
                     elif "error" in error_json and isinstance(error_json["error"], dict):
                         if "message" in error_json["error"]:
                             error_message = error_json["error"]["message"]
-            except (json.JSONDecodeError, KeyError):
+            except (fast_json.JSONDecodeError, KeyError):
                 pass
 
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=response.status_code,
                 content={
                     "error": {
@@ -182,10 +194,21 @@ async def chat_completions(
                 }
             )
 
-        messages_for_tokenizer = [msg.model_dump() for msg in request_data.messages]
-        tools_for_tokenizer = [tool.model_dump() for tool in request_data.tools] if request_data.tools else None
+        # Absent stream_options keeps usage in the final chunk, as before
+        include_usage = not request_data.stream or (request_data.stream_options or {}).get("include_usage") is not False
+
+        if include_usage:
+            # One serializer pass over the request instead of one model_dump() per element
+            dumped = request_data.model_dump(include={"messages", "tools"})
+            messages_for_tokenizer = dumped["messages"]
+            tools_for_tokenizer = dumped["tools"] or None
+        else:
+            messages_for_tokenizer = tools_for_tokenizer = None
 
         if request_data.stream:
+            # No extra queue here: stream_kiro_to_openai already reads upstream in a
+            # producer task with a bounded read-ahead queue, so Kiro reads overlap
+            # with client writes while slow clients still apply backpressure
             async def stream_wrapper():
                 try:
                     async for chunk in stream_kiro_to_openai(
@@ -195,12 +218,13 @@ async def chat_completions(
                         model_cache,
                         auth_manager,
                         request_messages=messages_for_tokenizer,
-                        request_tools=tools_for_tokenizer
+                        request_tools=tools_for_tokenizer,
+                        include_usage=include_usage
                     ):
                         yield chunk
                 finally:
                     await http_client.close()
-                    logger.info(f"[{get_timestamp()}] HTTP 200 - POST /v1/chat/completions (streaming) - completed")
+                    logger.info("HTTP 200 - POST /v1/chat/completions (streaming) - completed")
 
             return StreamingResponse(stream_wrapper(), media_type="text/event-stream")
         else:
@@ -215,16 +239,16 @@ async def chat_completions(
             )
 
             await http_client.close()
-            logger.info(f"[{get_timestamp()}] HTTP 200 - POST /v1/chat/completions (non-streaming) - completed")
+            logger.info("HTTP 200 - POST /v1/chat/completions (non-streaming) - completed")
 
-            return JSONResponse(content=collected_response)
+            return FastJSONResponse(content=collected_response)
 
     except HTTPException:
         await http_client.close()
         raise
     except Exception as e:
         await http_client.close()
-        error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+        error_msg = str(e) or f"{type(e).__name__}: {e!r}"
         logger.error(f"Internal error: {error_msg}", exc_info=True)
         if settings.debug_mode == "off":
             detail = "Internal server error"
@@ -1,36 +1,49 @@
 # -*- coding: utf-8 -*-
 """Health check routes."""
 
+import time
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request, Response
 
 from app.core.config import APP_VERSION
+from app.core.responses import FastJSONResponse
 from app.libs.auth import KiroAuthManager
 from app.libs.cache import ModelInfoCache
+from app.utils import fast_json
 
 router = APIRouter()
 
+# Static body of / and /api, encoded once for probes that hit them constantly
+_ROOT_JSON: bytes = fast_json.dumps_bytes({
+    "status": "ok",
+    "message": "Kiro-2API Gateway is running",
+    "version": APP_VERSION
+})
+
+# [epoch second, ISO-8601 UTC timestamp]; /health reports second resolution
+_health_timestamp_cache: list = [-1, ""]
+
+
+def _health_timestamp() -> str:
+    """Get current UTC timestamp in ISO format (reformatted at most once per second)."""
+    now = int(time.time())
+    if now != _health_timestamp_cache[0]:
+        _health_timestamp_cache[1] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _health_timestamp_cache[0] = now
+    return _health_timestamp_cache[1]
+
 
 @router.get("/")
 async def root():
     """Root endpoint - API info."""
-    return {
-        "status": "ok",
-        "message": "Kiro-2API Gateway is running",
-        "version": APP_VERSION
-    }
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 
 @router.get("/api")
 async def api_root():
     """API health check endpoint (JSON)."""
-    return {
-        "status": "ok",
-        "message": "Kiro-2API Gateway is running",
-        "version": APP_VERSION
-    }
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
 
 @router.get("/health")
@@ -44,18 +57,13 @@ async def health(request: Request):
     auth_manager: KiroAuthManager = request.app.state.auth_manager
     model_cache: ModelInfoCache = request.app.state.model_cache
 
-    token_valid = False
-    try:
-        if auth_manager._access_token and not auth_manager.is_token_expiring_soon():
-            token_valid = True
-    except Exception:
-        token_valid = False
-
-    return {
+    # Returned directly: the values are plain JSON types, so jsonable_encoder has nothing to do
+    return FastJSONResponse(content={
         "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": _health_timestamp(),
         "version": APP_VERSION,
-        "token_valid": token_valid,
+        "token_valid": auth_manager.has_valid_token,
+        "cache_ready": model_cache.is_ready,
         "cache_size": model_cache.size,
         "cache_last_update": model_cache.last_update_time
-    }
+    })
@@ -1,123 +1,89 @@
 # -*- coding: utf-8 -*-
 """Model listing routes."""
 
-import secrets
+import time
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Security
-from fastapi.security import APIKeyHeader
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Security
 from loguru import logger
 
-from app.core.config import settings, AVAILABLE_MODELS
-from app.libs.auth import KiroAuthManager
+from app.core.config import AVAILABLE_MODELS
+from app.core.security import api_key_header, is_valid_proxy_key, mask_token, split_auth_header
 from app.libs.cache import ModelInfoCache
 from app.models.schemas import OpenAIModel, ModelList
-from app.middleware.tracking import get_timestamp
+from app.utils import fast_json
 
 router = APIRouter()
 
-api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
-
-
-def _mask_token(token: str) -> str:
-    """Mask token for logging."""
-    if len(token) <= 8:
-        return "***"
-    return f"{token[:4]}...{token[-4:]}"
-
-
-async def verify_api_key(
-    request: Request,
-    auth_header: str = Security(api_key_header)
-) -> KiroAuthManager:
+# AVAILABLE_MODELS is static, so the /v1/models body is built and serialized once
+_MODELS_CREATED: int = int(time.time())
+_MODEL_LIST: ModelList = ModelList(data=[
+    OpenAIModel(
+        id=model_id,
+        created=_MODELS_CREATED,
+        owned_by="anthropic",
+        description="Claude model via Kiro API"
+    )
+    for model_id in AVAILABLE_MODELS
+])
+_MODEL_LIST_JSON: bytes = fast_json.dumps_bytes(_MODEL_LIST.model_dump())
+
+
+async def verify_api_key(auth_header: Optional[str] = Security(api_key_header)) -> None:
     """
     Verify API key in Authorization header.
 
-    Supports:
-    1. Traditional: "Bearer {PROXY_API_KEY}" - uses global AuthManager
-    2. Multi-tenant: "Bearer {PROXY_API_KEY}:{REFRESH_TOKEN}" - creates per-user AuthManager
+    /v1/models needs no auth manager, so only the proxy key is checked.
+    Accepts the same formats as chat's verify_api_key:
+    1. Traditional: "Bearer {PROXY_API_KEY}"
+    2. Multi-tenant: "Bearer {PROXY_API_KEY}:{REFRESH_TOKEN}"
 
     Args:
-        request: FastAPI Request
         auth_header: Authorization header value
 
-    Returns:
-        KiroAuthManager instance
-
     Raises:
         HTTPException: 401 if key is invalid or missing
     """
     if not auth_header:
-        logger.warning(f"[{get_timestamp()}] Missing Authorization header")
+        logger.warning("Missing Authorization header")
         raise HTTPException(status_code=401, detail="API Key invalid or missing")
 
-    # Support both "Bearer {token}" format and raw token (for Swagger UI)
-    if auth_header.startswith("Bearer "):
-        token = auth_header[7:]
+    proxy_key, sep, _ = split_auth_header(auth_header)
+    if is_valid_proxy_key(proxy_key):
+        return
+
+    if sep:
+        logger.warning("Invalid Proxy Key in multi-tenant mode: {}", mask_token(proxy_key))
     else:
-        token = auth_header
-    proxy_api_key = settings.proxy_api_key
-
-    if ':' in token:
-        parts = token.split(':', 1)
-        proxy_key = parts[0]
-        refresh_token = parts[1]
-
-        if not secrets.compare_digest(proxy_key, proxy_api_key):
-            logger.warning(f"[{get_timestamp()}] Invalid Proxy Key in multi-tenant mode: {_mask_token(proxy_key)}")
-            raise HTTPException(status_code=401, detail="API Key invalid or missing")
-
-        logger.debug(f"[{get_timestamp()}] Multi-tenant mode: using custom Refresh Token {_mask_token(refresh_token)}")
-        auth_manager = KiroAuthManager(
-            refresh_token=refresh_token,
-            region=settings.region,
-            profile_arn=settings.profile_arn
-        )
-        return auth_manager
-
-    if secrets.compare_digest(token, proxy_api_key):
-        logger.debug(f"[{get_timestamp()}] Traditional mode: using global AuthManager")
-        return request.app.state.auth_manager
-
-    logger.warning(f"[{get_timestamp()}] Invalid API Key in traditional mode")
+        logger.warning("Invalid API Key in traditional mode")
     raise HTTPException(status_code=401, detail="API Key invalid or missing")
 
 
 @router.get("/v1/models", response_model=ModelList)
 async def get_models(
     request: Request,
-    auth_manager: KiroAuthManager = Depends(verify_api_key)
+    _: None = Depends(verify_api_key)
 ):
     """
     Return available models list.
 
-    Uses static model list with optional dynamic updates from API.
-    Results are cached to reduce API load.
+    Serves the static model list pre-serialized at import; a stale model
+    metadata cache triggers a background refresh.
 
     Args:
         request: FastAPI Request
-        auth_manager: KiroAuthManager instance
 
     Returns:
         ModelList containing available models
     """
-    logger.info(f"[{get_timestamp()}] Received /v1/models request")
+    logger.info("Received /v1/models request")
 
     model_cache: ModelInfoCache = request.app.state.model_cache
 
     if model_cache.is_empty() or model_cache.is_stale():
         try:
-            import asyncio
-            asyncio.create_task(model_cache.refresh())
+            model_cache.schedule_refresh()
         except Exception as e:
-            logger.warning(f"[{get_timestamp()}] Failed to trigger model cache refresh: {e}")
-
-    openai_models = [
-        OpenAIModel(
-            id=model_id,
-            owned_by="anthropic",
-            description="Claude model via Kiro API"
-        )
-        for model_id in AVAILABLE_MODELS
-    ]
-
-    return ModelList(data=openai_models)
+            logger.warning("Failed to trigger model cache refresh: {}", e)
+
+    return Response(content=_MODEL_LIST_JSON, media_type="application/json")
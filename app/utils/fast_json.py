@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Fast JSON helpers.
+
+Uses orjson when it is installed and falls back to the standard
+library json module otherwise. Output is always UTF-8 (no ASCII escaping).
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAS_ORJSON: bool = orjson is not None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one type covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """
+    Deserialize JSON document.
+
+    Args:
+        data: JSON document as str or UTF-8 bytes
+
+    Returns:
+        Parsed Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize object to UTF-8 encoded JSON bytes.
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+        except TypeError:
+            # orjson rejects input the stdlib accepts (e.g. integers beyond 64 bits)
+            pass
+    return _stdlib_dumps(obj, indent).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize object to JSON string.
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        JSON document as str
+    """
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent).decode("utf-8")
+    return _stdlib_dumps(obj, indent)
+
+
+def _stdlib_dumps(obj: Any, indent: bool) -> str:
+    """Serialize with the standard library, matching orjson's output layout."""
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
@@ -6,7 +6,9 @@ Contains functions for fingerprint generation, header formatting,
 and other common utilities.
 """
 
+import functools
 import hashlib
+import os
 import uuid
 from typing import TYPE_CHECKING
 
@@ -16,11 +18,13 @@ if TYPE_CHECKING:
     from app.libs.auth import KiroAuthManager
 
 
+@functools.lru_cache(maxsize=1)
 def get_machine_fingerprint() -> str:
     """
     Generate unique machine fingerprint based on hostname and username.
 
     Used for User-Agent formatting to identify specific gateway installation.
+    Computed once per process; hostname and username do not change at runtime.
 
     Returns:
         SHA256 hash of string "{hostname}-{username}-kiro-2api"
@@ -35,10 +39,30 @@ def get_machine_fingerprint() -> str:
 
         return hashlib.sha256(unique_string.encode()).hexdigest()
     except Exception as e:
-        logger.warning(f"Failed to get machine fingerprint: {e}")
+        logger.warning("Failed to get machine fingerprint: {}", e)
         return hashlib.sha256(b"default-kiro-2api").hexdigest()
 
 
+@functools.lru_cache(maxsize=8)
+def _static_kiro_headers(fingerprint: str) -> dict:
+    """
+    Build the request-invariant Kiro headers for a fingerprint.
+
+    Authorization and amz-sdk-invocation-id are placeholders, kept so the
+    per-request copy preserves header order. Callers must copy the result.
+    """
+    return {
+        "Authorization": "",
+        "Content-Type": "application/json",
+        "User-Agent": f"aws-sdk-js/1.0.27 ua/2.1 os/win32#10.0.19044 lang/js md/nodejs#22.21.1 api/codewhispererstreaming#1.0.27 m/E Kiro2API-{fingerprint[:32]}",
+        "x-amz-user-agent": f"aws-sdk-js/1.0.27 Kiro2API-{fingerprint[:32]}",
+        "x-amzn-codewhisperer-optout": "true",
+        "x-amzn-kiro-agent-mode": "vibe",
+        "amz-sdk-invocation-id": "",
+        "amz-sdk-request": "attempt=1; max=3",
+    }
+
+
 def get_kiro_headers(auth_manager: "KiroAuthManager", token: str) -> dict:
     """
     Build headers for Kiro API requests.
@@ -55,18 +79,10 @@ def get_kiro_headers(auth_manager: "KiroAuthManager", token: str) -> dict:
     Returns:
         Dictionary with HTTP request headers
     """
-    fingerprint = auth_manager.fingerprint
-
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "User-Agent": f"aws-sdk-js/1.0.27 ua/2.1 os/win32#10.0.19044 lang/js md/nodejs#22.21.1 api/codewhispererstreaming#1.0.27 m/E Kiro2API-{fingerprint[:32]}",
-        "x-amz-user-agent": f"aws-sdk-js/1.0.27 Kiro2API-{fingerprint[:32]}",
-        "x-amzn-codewhisperer-optout": "true",
-        "x-amzn-kiro-agent-mode": "vibe",
-        "amz-sdk-invocation-id": str(uuid.uuid4()),
-        "amz-sdk-request": "attempt=1; max=3",
-    }
+    headers = _static_kiro_headers(auth_manager.fingerprint).copy()
+    headers["Authorization"] = "Bearer " + token
+    headers["amz-sdk-invocation-id"] = str(uuid.uuid4())
+    return headers
 
 
 def generate_completion_id() -> str:
@@ -74,9 +90,9 @@ def generate_completion_id() -> str:
     Generate unique ID for chat completion.
 
     Returns:
-        ID in format "chatcmpl-{uuid_hex}"
+        ID in format "chatcmpl-{32 hex chars}"
     """
-    return f"chatcmpl-{uuid.uuid4().hex}"
+    return "chatcmpl-" + os.urandom(16).hex()
 
 
 def generate_conversation_id() -> str:
@@ -94,6 +110,6 @@ def generate_tool_call_id() -> str:
     Generate unique ID for tool call.
 
     Returns:
-        ID in format "call_{uuid_hex[:8]}"
+        ID in format "call_{8 hex chars}"
     """
-    return f"call_{uuid.uuid4().hex[:8]}"
+    return "call_" + os.urandom(4).hex()